@@ -0,0 +1,53 @@
+import random
+import timeit
+
+from day1 import solver, stepwise_solver, batch_solver
+
+# compare the segment solver against the one-step-at-a-time reference solver on long synthetic routes
+
+
+def spiral_route(nrings):
+    # an outward square spiral covering every cell, then a turn back inward so there is a crossing to find
+    steps = ['R' + str(n) for n in range(1, 2 * nrings + 1) for _ in range(2)]
+    return ', '.join(steps + ['R2', 'R' + str(nrings)])
+
+
+def long_leg_route(nlegs, leglength):
+    # a staircase of long legs that never crosses itself, then a u-turn back along the last leg
+    steps = ['R' + str(leglength) if i % 2 else 'L' + str(leglength) for i in range(nlegs)]
+    return ', '.join(steps + ['R0', 'R' + str(leglength)])
+
+
+def bench(name, instructions, stop_at_crossing):
+    nsteps = sum(int(s.strip()[1:]) for s in instructions.split(','))
+    segment = solver(instructions, stop_at_crossing)
+    stepwise = stepwise_solver(instructions, stop_at_crossing)
+    assert segment == stepwise, (segment, stepwise)
+
+    tsegment = min(timeit.repeat(lambda: solver(instructions, stop_at_crossing), number=1, repeat=3))
+    tstepwise = timeit.timeit(lambda: stepwise_solver(instructions, stop_at_crossing), number=1)
+    print('{}: {} steps over {} instructions, stop_at_crossing={}: segment {:.4f}s, stepwise {:.2f}s ({:.0f}x)'.format(
+        name, nsteps, instructions.count(',') + 1, stop_at_crossing, tsegment, tstepwise, tstepwise / tsegment))
+
+
+def bench_batch(nroutes, nsteps):
+    rng = random.Random(0)
+    routes = [', '.join(rng.choice('LR') + str(rng.randint(1, 200)) for _ in range(nsteps)) for _ in range(nroutes)]
+
+    distances, positions = batch_solver(routes)
+    for i in range(0, nroutes, max(1, nroutes // 1000)):
+        assert (distances[i], positions[i].tolist()) == solver(routes[i])
+
+    tbatch = min(timeit.repeat(lambda: batch_solver(routes), number=1, repeat=3))
+    tloop = timeit.timeit(lambda: [solver(r) for r in routes], number=1)
+    print('batch: {} routes of {} instructions: batch_solver {:.3f}s, solver loop {:.3f}s ({:.1f}x)'.format(
+        nroutes, nsteps, tbatch, tloop, tloop / tbatch))
+
+
+if __name__ == '__main__':
+    for stop_at_crossing in (False, True):
+        bench('spiral', spiral_route(500), stop_at_crossing)
+        bench('long legs', long_leg_route(20, 100000), stop_at_crossing)
+
+    bench_batch(100000, 10)
+    bench_batch(10000, 150)
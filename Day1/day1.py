@@ -3,6 +3,9 @@
 #
 
 import numpy as np      # for vector maths
+from bisect import bisect_left, bisect_right
+from heapq import heappush, heappop
+from math import inf
 
 # the permitted cardinal directions
 cardinal_directions = ['north', 'south', 'east', 'west']
@@ -88,8 +91,11 @@ def apply_step_instruction(step, position, direction, onvisit):
     return newpos, newdirection
 
 
-def solver(stepinstructions, stop_at_crossing=False):
+def stepwise_solver(stepinstructions, stop_at_crossing=False):
     """
+    Reference solver for the first puzzle, walking the route one unit step at a time.
+    Kept for cross-checking the segment-based solver; prefer solver() for anything large.
+
     Solver for the first puzzle: find the distance to the end-point of a sequence of step instructions.
     The step instructions are a comma-seperated string of steps, where each step is left or right turn
     denoted by 'L' and 'R', followed by a given number of steps forward. (E.g. 'L2, R10, L2').
@@ -138,6 +144,299 @@ def solver(stepinstructions, stop_at_crossing=False):
     return dist, list(solutionpos)
 
 
+# unit [x,y] moves for each heading, indexed clockwise from north so that a turn is a +-1 (mod 4) heading delta
+heading_deltas = ((0, 1), (1, 0), (0, -1), (-1, 0))
+turn_heading_deltas = {'L': -1, 'R': 1}
+
+
+def parse_step_instructions(stepinstructions):
+    """
+    Parse a comma separated list of step instructions into (turn, distance) pairs.
+
+    :param stepinstructions: String holding the comma separated list of step instructions (e.g. 'L2, R10')
+    :return: a list of (turn, distance) tuples, where turn is the heading delta (-1 for 'L', +1 for 'R')
+    """
+    steps = []
+    for step in stepinstructions.split(','):
+        step = step.strip()
+        assert(len(step) >= 2)
+        assert(step[0] in turn_directions)
+        steps.append((turn_heading_deltas[step[0]], int(step[1:])))
+
+    return steps
+
+
+def steps_to_segments(steps):
+    """
+    Convert a parsed step list into axis-aligned segments of grid cells.
+
+    Each segment covers the cells after its start up to and including its end, so consecutive segments never share
+    a cell and the origin is only counted once it has been walked back onto (matching stepwise_solver()).
+    Zero-length steps only turn, and produce no segment.
+
+    :param steps: a list of (turn, distance) tuples as returned by parse_step_instructions()
+    :return: a list of (horizontal, fixed, start, end) tuples in walk order, where fixed is the y (horizontal) or
+             x (vertical) co-ordinate of the segment, and start..end are the first and last cells walked along the
+             other axis
+    """
+    segments = []
+    heading, x, y = 0, 0, 0
+    for turn, distance in steps:
+        heading = (heading + turn) % 4
+        if distance == 0:
+            continue
+
+        dx, dy = heading_deltas[heading]
+        if dy == 0:
+            segments.append((True, y, x + dx, x + dx * distance))
+            x += dx * distance
+        else:
+            segments.append((False, x, y + dy, y + dy * distance))
+            y += dy * distance
+
+    return segments
+
+
+class MinIndexTree:
+    """
+    Segment tree giving the minimum segment index active at any of a sorted set of line co-ordinates.
+
+    Several segments may be active on the same line, so each leaf keeps a heap of active indices with lazy removal.
+    """
+    def __init__(self, coords):
+        self.coords = coords
+        self.size = 1
+        while self.size < len(coords):
+            self.size *= 2
+        self.tree = [inf] * (2 * self.size)
+        self.heaps = [[] for _ in coords]
+        self.removed = set()
+
+    def leaf_min(self, coord):
+        return self.tree[self.size + bisect_left(self.coords, coord)]
+
+    def _update(self, leaf):
+        heap = self.heaps[leaf]
+        while heap and heap[0] in self.removed:
+            heappop(heap)
+
+        node = self.size + leaf
+        self.tree[node] = heap[0] if heap else inf
+        node //= 2
+        while node:
+            self.tree[node] = min(self.tree[2 * node], self.tree[2 * node + 1])
+            node //= 2
+
+    def add(self, coord, index):
+        leaf = bisect_left(self.coords, coord)
+        heappush(self.heaps[leaf], index)
+        self._update(leaf)
+
+    def remove(self, coord, index):
+        self.removed.add(index)
+        self._update(bisect_left(self.coords, coord))
+
+    def range_min(self, lo, hi):
+        """
+        :return: the minimum index active on any line with co-ordinate in lo..hi (inclusive), or inf if there are none
+        """
+        l = self.size + bisect_left(self.coords, lo)
+        r = self.size + bisect_right(self.coords, hi)
+        result = inf
+        while l < r:
+            if l & 1:
+                result = min(result, self.tree[l])
+                l += 1
+            if r & 1:
+                r -= 1
+                result = min(result, self.tree[r])
+            l //= 2
+            r //= 2
+        return result
+
+
+def first_crossing_segment_index(segments, horizontal):
+    """
+    Sweep along one axis to find the earliest segment that covers a cell of an earlier one, considering crossings
+    between perpendicular segments and overlaps between collinear segments on the swept lines.
+
+    The sweep runs across the fixed co-ordinates of the perpendicular segments, with the swept segments held in a
+    MinIndexTree over their lines. Each crossing pair (i, j) is only reported as max(i, j), since that is the
+    segment during which the revisit actually happens.
+
+    :param segments: a list of segments as returned by steps_to_segments()
+    :param horizontal: True to sweep the horizontal segments (and so x), False to sweep the vertical ones
+    :return: the index of the earliest segment that revisits a cell, or inf if there is none
+    """
+    # events along the sweep: swept segments start (0) before perpendicular queries (1) before swept segments end (2)
+    events = []
+    for index, (ishorizontal, fixed, start, end) in enumerate(segments):
+        lo, hi = min(start, end), max(start, end)
+        if ishorizontal == horizontal:
+            events.append((lo, 0, index, fixed))
+            events.append((hi, 2, index, fixed))
+        else:
+            events.append((fixed, 1, index, (lo, hi)))
+    events.sort()
+
+    active = MinIndexTree(sorted(set(s[1] for s in segments if s[0] == horizontal)))
+    first = inf
+    for _, kind, index, arg in events:
+        if kind == 0:
+            # any segment still active on the same line overlaps this one
+            first = min(first, max(index, active.leaf_min(arg)))
+            active.add(arg, index)
+        elif kind == 1:
+            first = min(first, max(index, active.range_min(*arg)))
+        else:
+            active.remove(arg, index)
+
+    return first
+
+
+def first_revisit_on_segment(segments, index):
+    """
+    Find the first cell along a segment that is also covered by an earlier segment.
+
+    :return: the (x, y) position of the first revisited cell, or None if there is none
+    """
+    horizontal, fixed, start, end = segments[index]
+    step = 1 if end >= start else -1
+
+    hits = []
+    for otherhorizontal, otherfixed, otherstart, otherend in segments[:index]:
+        lo, hi = min(otherstart, otherend), max(otherstart, otherend)
+        if otherhorizontal == horizontal:
+            # collinear: the first cell of the overlap along the walk
+            if otherfixed == fixed:
+                v = max(start, lo) if step > 0 else min(start, hi)
+                if lo <= v <= hi and min(start, end) <= v <= max(start, end):
+                    hits.append(v)
+        elif lo <= fixed <= hi and min(start, end) <= otherfixed <= max(start, end):
+            hits.append(otherfixed)
+
+    if not hits:
+        return None
+
+    v = min(hits) if step > 0 else max(hits)
+    return (v, fixed) if horizontal else (fixed, v)
+
+
+def find_first_crossing(steps):
+    """
+    Find the first position visited twice by a parsed step list.
+
+    The segment that first revisits a cell is found with one sweep per axis (O(n log n) in the number of steps),
+    and then only that segment is checked against the segments before it to find the revisited cell.
+
+    :param steps: a list of (turn, distance) tuples as returned by parse_step_instructions()
+    :return: the (x, y) position first visited twice, or None if the route never crosses itself
+    """
+    segments = steps_to_segments(steps)
+
+    index = min(first_crossing_segment_index(segments, True), first_crossing_segment_index(segments, False))
+    if index == inf:
+        return None
+
+    return first_revisit_on_segment(segments, index)
+
+
+def find_end_position(steps):
+    """
+    :param steps: a list of (turn, distance) tuples as returned by parse_step_instructions()
+    :return: the (x, y) position at the end of the route
+    """
+    heading, x, y = 0, 0, 0
+    for turn, distance in steps:
+        heading = (heading + turn) % 4
+        dx, dy = heading_deltas[heading]
+        x += dx * distance
+        y += dy * distance
+
+    return x, y
+
+
+def solver(stepinstructions, stop_at_crossing=False):
+    """
+    Solver for the first puzzle: find the distance to the end-point of a sequence of step instructions.
+    The step instructions are a comma-seperated string of steps, where each step is left or right turn
+    denoted by 'L' and 'R', followed by a given number of steps forward. (E.g. 'L2, R10, L2').
+
+    The endpoint co-ordinates are [x,y] where East is +ive x and North is +ive y.
+
+    Each step is treated as a whole segment on plain ints, so the cost depends on the number of steps and not on
+    the total distance walked.
+
+    :param stepinstructions: String holding the comma separated list of step instructions
+    :param stop_at_crossing: if True, the end point is the first position visited twice
+    :return: A tuple of (distance, position) where distance is the grid-distance (i.e. L1-norm) to the end point, and position is an [x,y] list holding the endpoint.
+    """
+    steps = parse_step_instructions(stepinstructions)
+
+    if stop_at_crossing:
+        solutionpos = find_first_crossing(steps)
+        if solutionpos is None:
+            raise ValueError('the step instructions never visit a position twice')
+    else:
+        solutionpos = find_end_position(steps)
+
+    # the distance from the origin is the L1-norm of the position
+    dist = abs(solutionpos[0]) + abs(solutionpos[1])
+
+    return dist, list(solutionpos)
+
+
+def batch_solver(instructionlist):
+    """
+    Vectorised solver for the end points of many step instruction strings at once (see solver()).
+
+    All the strings are joined into one byte buffer, with turns encoded as integer heading deltas and distances
+    parsed from the digit runs using numpy, so there is no Python-level loop per route or per step. The positions
+    after every step come from a cumulative sum over the stacked step vectors of all the routes.
+
+    :param instructionlist: a list of strings, each holding a comma separated list of step instructions
+    :return: a tuple of (distances, positions) where distances is a length-n array of the grid-distances to the end
+             points, and positions is an n x 2 array holding the [x,y] end point of each route
+    """
+    if not instructionlist:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 2), dtype=np.int64)
+
+    buf = np.frombuffer(';'.join(instructionlist).encode('ascii'), dtype=np.uint8)
+
+    # each turn character starts a step, and the routes are delimited by the ';' separators
+    isturn = (buf == ord('L')) | (buf == ord('R'))
+    turnpos = np.flatnonzero(isturn)
+    route = np.cumsum(buf == ord(';'), dtype=np.int32)[turnpos]
+    routesteps = np.bincount(route, minlength=len(instructionlist))
+    assert(np.all(routesteps > 0))
+    routestart = np.concatenate(([0], np.cumsum(routesteps)[:-1]))
+
+    # the headings are the per-route cumulative sums of the turn deltas, starting from north (0)
+    turns = np.where(buf[turnpos] == ord('R'), 1, -1)
+    cumturns = np.cumsum(turns)
+    routeturnbase = np.concatenate(([0], cumturns))[routestart]
+    headings = (cumturns - routeturnbase[route]) % 4
+
+    # each digit belongs to the step of the last turn before it, and is scaled by its place within that number
+    digitpos = np.flatnonzero((buf >= ord('0')) & (buf <= ord('9')))
+    digitstep = np.cumsum(isturn, dtype=np.int32)[digitpos] - 1
+    stepdigits = np.bincount(digitstep, minlength=len(turnpos))
+    assert(np.all(stepdigits > 0))
+    stepdigitlast = np.cumsum(stepdigits) - 1
+    stepdigitstart = stepdigitlast - stepdigits + 1
+    place = digitpos[stepdigitlast][digitstep] - digitpos
+    digits = (buf[digitpos] - ord('0')).astype(np.int64) * (10 ** np.arange(19, dtype=np.int64))[place]
+    distances = np.add.reduceat(digits, stepdigitstart)
+
+    # positions after every step, then the end point of each route is the change over its steps
+    stepvectors = np.array(heading_deltas, dtype=np.int64)[headings] * distances[:, np.newaxis]
+    positions = np.concatenate((np.zeros((1, 2), dtype=np.int64), np.cumsum(stepvectors, axis=0)))
+    routeend = np.append(routestart[1:], len(turnpos))
+    endpoints = positions[routeend] - positions[routestart]
+
+    return np.abs(endpoints).sum(axis=1), endpoints
+
+
 if __name__ == '__main__':
     puzzleinput = 'R2, L5, L4, L5, R4, R1, L4, R5, R3, R1, L1, L1, R4, L4, L1, R4, L4, R4, L3, R5, R4, R1, R3, L1, ' +\
                   'L1, R1, L2, R5, L4, L3, R1, L2, L2, R192, L3, R5, R48, R5, L2, R76, R4, R2, R1, L1, L5, L1, ' +\
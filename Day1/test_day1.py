@@ -1,6 +1,7 @@
 import unittest
+import random
 
-from day1 import solver
+from day1 import solver, stepwise_solver, batch_solver
 
 class Day1ASolverTest(unittest.TestCase):
 
@@ -34,5 +35,72 @@ class Day1BSolverTest(unittest.TestCase):
         self.assertEqual(dist, 4)
         self.assertEqual(pos, [4, 0])
 
+def spiral_instructions(nrings, crossback):
+    # an outward square spiral never revisits a cell, then a short step along the next ring and a turn inward
+    # crosses back over the spiral
+    steps = ['R' + str(n) for n in range(1, 2 * nrings + 1) for _ in range(2)]
+    return ', '.join(steps + ['R2', 'R' + str(crossback)])
+
+class Day1SegmentSolverTest(unittest.TestCase):
+
+    def test_matches_stepwise_random(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            # start with a non-zero step so that both solvers have an end position
+            steps = [rng.choice('LR') + str(rng.randint(1, 20))] +\
+                    [rng.choice('LR') + str(rng.randint(0, 20)) for _ in range(rng.randint(0, 40))]
+            instructions = ', '.join(steps)
+
+            self.assertEqual(solver(instructions), stepwise_solver(instructions))
+            try:
+                expected = stepwise_solver(instructions, True)
+            except TypeError:
+                # the stepwise solver has no crossing to report
+                with self.assertRaises(ValueError):
+                    solver(instructions, True)
+                continue
+            self.assertEqual(solver(instructions, True), expected)
+
+    def test_reversal_over_previous_segment(self):
+        # a zero-length step allows a u-turn back along the previous segment
+        instructions = 'R5, R0, R2'
+        self.assertEqual(solver(instructions, True), stepwise_solver(instructions, True))
+        self.assertEqual(solver(instructions, True), (4, [4, 0]))
+
+    def test_returning_to_origin(self):
+        # the origin only counts as visited once it has been walked back onto
+        instructions = 'R1, R1, R1, R1, R1, R1'
+        self.assertEqual(solver(instructions, True), stepwise_solver(instructions, True))
+        self.assertEqual(solver(instructions, True), (1, [1, 0]))
+
+    def test_spiral(self):
+        for crossback in (1, 5, 30, 60):
+            instructions = spiral_instructions(30, crossback)
+            self.assertEqual(solver(instructions, True), stepwise_solver(instructions, True))
+            self.assertEqual(solver(instructions), stepwise_solver(instructions))
+
+class Day1BatchSolverTest(unittest.TestCase):
+
+    def test_examples(self):
+        distances, positions = batch_solver(['R2, L3', 'R2, R2, R2', 'R5, L5, R5, R3'])
+
+        self.assertEqual(list(distances), [5, 2, 12])
+        self.assertEqual(positions.tolist(), [[2, 3], [0, -2], [10, 2]])
+
+    def test_empty(self):
+        distances, positions = batch_solver([])
+
+        self.assertEqual(distances.shape, (0,))
+        self.assertEqual(positions.shape, (0, 2))
+
+    def test_matches_solver_random(self):
+        rng = random.Random(2)
+        routes = [', '.join(rng.choice('LR') + str(rng.randint(0, 1000)) for _ in range(rng.randint(1, 30)))
+                  for _ in range(500)]
+
+        distances, positions = batch_solver(routes)
+        for route, dist, pos in zip(routes, distances, positions):
+            self.assertEqual((dist, pos.tolist()), solver(route))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+import random
+import sys
+import timeit
+import tracemalloc
+
+from day10 import create_bots_and_bins_from_directives, perform_bots_step, run_bots
+from day10 import compile_bot_network, plan_inputs, evaluate_plan, BotNetworkArrays, generate_bot_network
+
+# compare the ready-queue scheduler against repeated perform_bots_step scans, and replaying new inputs through a
+# compiled plan against rebuilding the bots for each set of inputs, on generated bot networks. Also compares the memory
+# held by the Bot/OutputBin objects against the BotNetworkArrays columns.
+# usage: python bench_day10.py [nbots]
+
+
+def run_by_steps(bots_and_bins):
+    while perform_bots_step(bots_and_bins):
+        pass
+
+
+def retained_memory(build):
+    tracemalloc.start()
+    built = build()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, retained
+
+
+if __name__ == '__main__':
+    nbots = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 5
+
+    for n in (1000, 2000, 4000):
+        directives = generate_bot_network(n)
+        bots_and_bins = create_bots_and_bins_from_directives(directives)
+        tsteps = timeit.timeit(lambda: run_by_steps(bots_and_bins), number=1)
+        bots_and_bins = create_bots_and_bins_from_directives(directives)
+        tqueue = timeit.timeit(lambda: run_bots(bots_and_bins), number=1)
+        print('{} bots: perform_bots_step scans {:.2f}s, run_bots {:.4f}s ({:.0f}x)'.format(n, tsteps, tqueue, tsteps / tqueue))
+
+    directives = generate_bot_network(nbots)
+    bots_and_bins = create_bots_and_bins_from_directives(directives)
+    tqueue = timeit.timeit(lambda: run_bots(bots_and_bins), number=1)
+    print('{} bots: run_bots {:.2f}s'.format(nbots, tqueue))
+
+    # replay sets of new values, going to the same bots as the value directives
+    nreplays = 5
+    rng = random.Random(1)
+    tcompile = timeit.timeit(lambda: compile_bot_network(directives), number=1)
+    plan = compile_bot_network(directives)
+    inputs = plan_inputs(plan, directives)
+    replays = [[(i, rng.randint(0, 10 * nbots)) for i, _ in inputs] for _ in range(nreplays)]
+    valuebots = [directive.split()[-1] for directive in directives if directive.startswith('value')]
+    gives = [directive for directive in directives if not directive.startswith('value')]
+
+    def rebuild_and_run():
+        for replay in replays:
+            values = ['value {} goes to bot {}'.format(value, bot) for (_, value), bot in zip(replay, valuebots)]
+            run_bots(create_bots_and_bins_from_directives(gives + values))
+
+    trebuild = timeit.timeit(rebuild_and_run, number=1)
+    treplay = timeit.timeit(lambda: [evaluate_plan(plan, replay) for replay in replays], number=1)
+    print('{} bots, {} input sets: rebuild and run_bots {:.2f}s, compile {:.2f}s then evaluate_plan {:.2f}s ({:.1f}x)'.format(
+        nbots, nreplays, trebuild, tcompile, treplay, trebuild / (tcompile + treplay)))
+
+    bots_and_bins, objectbytes = retained_memory(lambda: create_bots_and_bins_from_directives(directives))
+    tobjects = timeit.timeit(lambda: run_bots(bots_and_bins), number=1)
+    del bots_and_bins
+    network, arraybytes = retained_memory(lambda: BotNetworkArrays.from_directives(directives))
+    tarrays = timeit.timeit(lambda: network.run(), number=1)
+    print('{} bots: Bot objects {:.1f}MB, run_bots {:.2f}s; BotNetworkArrays {:.1f}MB ({:.1f}x smaller), run {:.2f}s'.format(
+        nbots, objectbytes / 1e6, tobjects, arraybytes / 1e6, objectbytes / arraybytes, tarrays))
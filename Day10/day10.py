@@ -1,3 +1,6 @@
+import array
+import collections
+import random
 import re
 
 
@@ -138,6 +141,392 @@ def perform_bots_step(bots_and_bins, oncompare=None):
     return True
 
 
+def bot_sources(bots_and_bins):
+    """
+    :return: dict from the name of each bot or bin to the list of bots that give chips to it
+    """
+    sources = collections.defaultdict(list)
+    for bot in bots_and_bins.values():
+        if isinstance(bot, Bot) and bot.lowdest is not None:
+            sources[bot.lowdest].append(bot)
+            if bot.highdest != bot.lowdest:
+                sources[bot.highdest].append(bot)
+    return sources
+
+
+def run_bots(bots_and_bins, oncompare=None):
+    """
+    Run give directives until no bot can perform one, as repeated perform_bots_step calls would.
+
+    Rather than scanning every bot for each give, a queue holds the bots that might be runnable, and after a give only
+    the bots affected by it are queued: the targets (which gained a chip) and the bots giving to the bot that gave
+    (which can now give to it again). Queued bots are checked with can_perform_give_directive when they are taken, so
+    the cost is linear in the number of gives (and the fan-in of the bots).
+
+    :param oncompare: called as oncompare(name, low, high) before each give, as for perform_bots_step
+    :return: the number of give directives performed
+    """
+    sources = bot_sources(bots_and_bins)
+    ready = collections.deque(bot for bot in bots_and_bins.values() if bot.can_perform_give_directive(bots_and_bins))
+
+    gives = 0
+    while ready:
+        bot = ready.popleft()
+        if not bot.can_perform_give_directive(bots_and_bins):
+            continue
+
+        bot.perform_give_directive(bots_and_bins, oncompare)
+        gives += 1
+
+        ready.append(bots_and_bins[bot.lowdest])
+        ready.append(bots_and_bins[bot.highdest])
+        ready.extend(sources[bot.name])
+
+    return gives
+
+
+# A bot network compiled into a flat plan, with the bots in topological order (every bot comes after the bots that
+# give to it). names holds the 'bot N' name of each bot in plan order and index maps the bot number to its position.
+# lowtarget and hightarget hold the plan position of the target bot, or ~N (a negative number) for 'output N'.
+BotNetworkPlan = collections.namedtuple('BotNetworkPlan', ['names', 'index', 'lowtarget', 'hightarget', 'noutputs'])
+
+
+def compile_bot_network(directives):
+    """
+    Compile the give directives into a BotNetworkPlan. The values in value directives are not part of the plan (see
+    plan_inputs), only the bots they go to.
+
+    :raises ValueError: if the give directives form a cycle
+    """
+    gives = {}
+    noutputs = 0
+    for directive in directives:
+        match = match_give_directive_re.match(directive)
+        if match:
+            frombot, lowkind, low, highkind, high = match.groups()
+            gives[int(frombot)] = ((lowkind, int(low)), (highkind, int(high)))
+            for kind, target in gives[int(frombot)]:
+                if kind == 'output':
+                    noutputs = max(noutputs, target + 1)
+                else:
+                    gives.setdefault(target, None)
+        else:
+            match = match_value_move_re.match(directive)
+            assert match, "Encountered a directive that didn't match any known directives"
+            gives.setdefault(int(match.group(2)), None)
+
+    # Kahn's algorithm, starting from the bots that no other bot gives to
+    indegree = dict.fromkeys(gives, 0)
+    for targets in gives.values():
+        for kind, target in targets or ():
+            if kind == 'bot':
+                indegree[target] += 1
+
+    order = [bot for bot, degree in indegree.items() if degree == 0]
+    for bot in order:
+        for kind, target in gives[bot] or ():
+            if kind == 'bot':
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    order.append(target)
+
+    if len(order) != len(gives):
+        raise ValueError('the give directives form a cycle')
+
+    index = {bot: i for i, bot in enumerate(order)}
+
+    def plan_target(kind, target):
+        return index[target] if kind == 'bot' else ~target
+
+    lowtarget = [plan_target(*gives[bot][0]) if gives[bot] else None for bot in order]
+    hightarget = [plan_target(*gives[bot][1]) if gives[bot] else None for bot in order]
+
+    return BotNetworkPlan(['bot ' + str(bot) for bot in order], index, lowtarget, hightarget, noutputs)
+
+
+def plan_inputs(plan, directives):
+    """
+    :return: list of (plan position, value) for each value directive
+    """
+    inputs = []
+    for directive in directives:
+        match = match_value_move_re.match(directive)
+        if match:
+            inputs.append((plan.index[int(match.group(2))], int(match.group(1))))
+    return inputs
+
+
+def evaluate_plan(plan, inputs, oncompare=None):
+    """
+    Run a compiled bot network in one pass over the bots in plan order.
+
+    Every bot before a bot in the plan has given all of its chips by the time it is reached, so a bot that is given
+    more than two chips (is refilled) gives them away in pairs, in the order they arrived, keeping any odd last chip.
+    When several bots give to the same refilled bot, the chips arrive in plan order. That is one valid schedule, but
+    perform_bots_step, run_bots and BotNetworkArrays.run may pair those chips differently and give different outputs.
+
+    :param inputs: list of (plan position, value) for the chips given to the bots at the start
+    :param oncompare: called as oncompare(name, low, high) before each give, as for perform_bots_step
+    :return: list holding the list of chips in each output bin
+    """
+    nbots = len(plan.names)
+    holding = [None] * nbots
+    outputs = [[] for _ in range(plan.noutputs)]
+
+    def give(target, value):
+        if target < 0:
+            outputs[~target].append(value)
+        elif holding[target] is None:
+            holding[target] = [value]
+        else:
+            holding[target].append(value)
+
+    for target, value in inputs:
+        give(target, value)
+
+    lowtarget = plan.lowtarget
+    hightarget = plan.hightarget
+    for i in range(nbots):
+        # bots that never get two chips, or have no give directive, keep what they hold
+        chips = holding[i]
+        if chips is None or len(chips) < 2 or lowtarget[i] is None:
+            continue
+        for j in range(0, len(chips) - 1, 2):
+            low, high = sorted(chips[j:j + 2])
+            if oncompare:
+                oncompare(plan.names[i], low, high)
+            give(lowtarget[i], low)
+            give(hightarget[i], high)
+
+    return outputs
+
+
+class BotView:
+    """
+    Thin view of one bot in a BotNetworkArrays, with the same name/holding/lowdest/highdest attributes as Bot.
+    """
+    __slots__ = ('network', 'id')
+
+    def __init__(self, network, id):
+        self.network = network
+        self.id = id
+
+    @property
+    def name(self):
+        return 'bot ' + str(self.id)
+
+    @property
+    def holding(self):
+        return [chip for chip in (self.network.chip0[self.id], self.network.chip1[self.id]) if chip >= 0]
+
+    @property
+    def lowdest(self):
+        return self.network.target_name(self.network.lowkind[self.id], self.network.lowid[self.id])
+
+    @property
+    def highdest(self):
+        return self.network.target_name(self.network.highkind[self.id], self.network.highid[self.id])
+
+
+class OutputView:
+    """
+    Thin view of one output bin in a BotNetworkArrays. Finding its chips scans the log of output chips.
+    """
+    __slots__ = ('network', 'id')
+
+    def __init__(self, network, id):
+        self.network = network
+        self.id = id
+
+    @property
+    def name(self):
+        return 'output ' + str(self.id)
+
+    @property
+    def holding(self):
+        return [chip for output, chip in zip(self.network.outputids, self.network.outputchips) if output == self.id]
+
+
+class BotNetworkArrays:
+    """
+    Bots and output bins stored in integer-indexed array columns, rather than as Bot/OutputBin objects keyed by name.
+
+    Bot N is held at index N of each bot column: the two chip slots (-1 when empty) and the kind and id of the low and
+    high targets (kind -1 when the bot has no give directive). Chips given to outputs are appended to a log of
+    (output id, chip) columns. BotView and OutputView give object-like access for inspection.
+    """
+    no_target = -1
+    bot_kind = 0
+    output_kind = 1
+    kinds = {'bot': bot_kind, 'output': output_kind}
+
+    def __init__(self, nbots):
+        self.chip0 = array.array('i', [-1]) * nbots
+        self.chip1 = array.array('i', [-1]) * nbots
+        self.lowkind = array.array('b', [self.no_target]) * nbots
+        self.lowid = array.array('i', [0]) * nbots
+        self.highkind = array.array('b', [self.no_target]) * nbots
+        self.highid = array.array('i', [0]) * nbots
+        self.outputids = array.array('i')
+        self.outputchips = array.array('i')
+
+    @staticmethod
+    def from_directives(directives):
+        values = []
+        gives = []
+        nbots = 0
+        for directive in directives:
+            match = match_value_move_re.match(directive)
+            if match:
+                value, bot = int(match.group(1)), int(match.group(2))
+                values.append((bot, value))
+                nbots = max(nbots, bot + 1)
+                continue
+
+            match = match_give_directive_re.match(directive)
+            assert match, "Encountered a directive that didn't match any known directives"
+            frombot, lowkind, low, highkind, high = match.groups()
+            gives.append((int(frombot), lowkind, int(low), highkind, int(high)))
+            nbots = max(nbots, int(frombot) + 1,
+                        int(low) + 1 if lowkind == 'bot' else 0, int(high) + 1 if highkind == 'bot' else 0)
+
+        network = BotNetworkArrays(nbots)
+        for frombot, lowkind, low, highkind, high in gives:
+            network.lowkind[frombot] = BotNetworkArrays.kinds[lowkind]
+            network.lowid[frombot] = low
+            network.highkind[frombot] = BotNetworkArrays.kinds[highkind]
+            network.highid[frombot] = high
+        for bot, value in values:
+            network.give(BotNetworkArrays.bot_kind, bot, value)
+
+        return network
+
+    def target_name(self, kind, id):
+        if kind == self.no_target:
+            return None
+        return ('bot ' if kind == self.bot_kind else 'output ') + str(id)
+
+    def bot(self, id):
+        return BotView(self, id)
+
+    def output(self, id):
+        return OutputView(self, id)
+
+    def give(self, kind, id, value):
+        if kind == self.output_kind:
+            self.outputids.append(id)
+            self.outputchips.append(value)
+        elif self.chip0[id] < 0:
+            self.chip0[id] = value
+        else:
+            assert self.chip1[id] < 0, "Bot was given more than two chips"
+            self.chip1[id] = value
+
+    def can_give(self, bot):
+        return (self.chip1[bot] >= 0 and self.lowkind[bot] != self.no_target and
+                (self.lowkind[bot] == self.output_kind or self.chip1[self.lowid[bot]] < 0) and
+                (self.highkind[bot] == self.output_kind or self.chip1[self.highid[bot]] < 0))
+
+    def sources(self):
+        """
+        :return: tuple of (start, sources) arrays, where sources[start[n]:start[n + 1]] are the bots giving to bot n
+        """
+        nbots = len(self.chip0)
+        counts = array.array('i', [0]) * (nbots + 1)
+        for kinds, ids in ((self.lowkind, self.lowid), (self.highkind, self.highid)):
+            for kind, id in zip(kinds, ids):
+                if kind == self.bot_kind:
+                    counts[id + 1] += 1
+        for n in range(nbots):
+            counts[n + 1] += counts[n]
+
+        fill = array.array('i', counts)
+        sources = array.array('i', [0]) * counts[nbots]
+        for kinds, ids in ((self.lowkind, self.lowid), (self.highkind, self.highid)):
+            for bot, (kind, id) in enumerate(zip(kinds, ids)):
+                if kind == self.bot_kind:
+                    sources[fill[id]] = bot
+                    fill[id] += 1
+        return counts, sources
+
+    def run(self, oncompare=None):
+        """
+        Run give directives until no bot can perform one, with the same ready queue as run_bots.
+
+        :param oncompare: called as oncompare(name, low, high) before each give, as for perform_bots_step
+        :return: the number of give directives performed
+        """
+        start, sources = self.sources()
+        ready = collections.deque(bot for bot in range(len(self.chip0)) if self.can_give(bot))
+
+        gives = 0
+        while ready:
+            bot = ready.popleft()
+            if not self.can_give(bot):
+                continue
+
+            low, high = self.chip0[bot], self.chip1[bot]
+            if low > high:
+                low, high = high, low
+            if oncompare:
+                oncompare('bot ' + str(bot), low, high)
+
+            self.chip0[bot] = self.chip1[bot] = -1
+            self.give(self.lowkind[bot], self.lowid[bot], low)
+            self.give(self.highkind[bot], self.highid[bot], high)
+            gives += 1
+
+            for kind, id in ((self.lowkind[bot], self.lowid[bot]), (self.highkind[bot], self.highid[bot])):
+                if kind == self.bot_kind:
+                    ready.append(id)
+            ready.extend(sources[start[bot]:start[bot + 1]])
+
+        return gives
+
+    def output_holdings(self):
+        """
+        :return: dict from output id to the list of chips it holds
+        """
+        holdings = collections.defaultdict(list)
+        for output, chip in zip(self.outputids, self.outputchips):
+            holdings[output].append(chip)
+        return dict(holdings)
+
+
+def generate_bot_network(nbots, window=20, seed=0):
+    """
+    Generate a random acyclic bot network, where every bot gets exactly two chips, from bots earlier in a shuffled
+    order or from value directives.
+
+    :param nbots: number of bots
+    :param window: how far along the shuffled order a bot may give its chips
+    :param seed: seed for the random number generator
+    :return: list of directive strings, in a shuffled order
+    """
+    rng = random.Random(seed)
+    ids = list(range(nbots))
+    rng.shuffle(ids)
+    need = [2] * nbots
+    noutputs = 0
+    directives = []
+    for i in range(nbots):
+        targets = []
+        for _ in range(2):
+            j = rng.randint(i + 1, i + window)
+            if j < nbots and need[j] > 0:
+                need[j] -= 1
+                targets.append('bot {}'.format(ids[j]))
+            else:
+                targets.append('output {}'.format(noutputs))
+                noutputs += 1
+        directives.append('bot {} gives low to {} and high to {}'.format(ids[i], *targets))
+        for _ in range(need[i]):
+            directives.append('value {} goes to bot {}'.format(rng.randint(0, 10 * nbots), ids[i]))
+        need[i] = 0
+    rng.shuffle(directives)
+    return directives
+
+
 def day10_solver(directives):
     bots_and_bins = create_bots_and_bins_from_directives(directives)
 
@@ -148,8 +537,7 @@ def day10_solver(directives):
         if low==17 and high==61:
             logoutput += name + ' compared ' + str(low) + ' with ' + str(high) + '\n'
 
-    while perform_bots_step(bots_and_bins, oncompare):
-        pass
+    run_bots(bots_and_bins, oncompare)
 
     logoutput += '\n'
     product = 1
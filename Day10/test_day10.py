@@ -1,6 +1,7 @@
 import unittest
 
-from day10 import create_bots_and_bins_from_directives, perform_bots_step
+from day10 import create_bots_and_bins_from_directives, perform_bots_step, run_bots
+from day10 import compile_bot_network, plan_inputs, evaluate_plan, BotNetworkArrays, generate_bot_network
 
 
 class TestDay10(unittest.TestCase):
@@ -43,5 +44,128 @@ class TestDay10(unittest.TestCase):
         didstep = perform_bots_step(bots_and_bins)
         self.assertEqual(didstep, False)
 
+    def test_run_bots_matches_steps_random(self):
+        directives = generate_bot_network(300, seed=10)
+
+        stepped = create_bots_and_bins_from_directives(directives)
+        stepped_compares = []
+        while perform_bots_step(stepped, lambda *compare: stepped_compares.append(compare)):
+            pass
+
+        queued = create_bots_and_bins_from_directives(directives)
+        queued_compares = []
+        gives = run_bots(queued, lambda *compare: queued_compares.append(compare))
+
+        self.assertEqual(gives, 300)
+        self.assertEqual(sorted(queued_compares), sorted(stepped_compares))
+        self.assertEqual({name: b.holding for name, b in queued.items()}, {name: b.holding for name, b in stepped.items()})
+
+    def test_plan_matches_steps_random(self):
+        directives = generate_bot_network(300, seed=11)
+
+        bots_and_bins = create_bots_and_bins_from_directives(directives)
+        run_compares = []
+        run_bots(bots_and_bins, lambda *compare: run_compares.append(compare))
+
+        plan = compile_bot_network(directives)
+        plan_compares = []
+        outputs = evaluate_plan(plan, plan_inputs(plan, directives), lambda *compare: plan_compares.append(compare))
+
+        self.assertEqual(sorted(plan_compares), sorted(run_compares))
+        self.assertEqual({'output ' + str(i): holding for i, holding in enumerate(outputs)},
+                         {name: b.holding for name, b in bots_and_bins.items() if name.startswith('output')})
+
+    def test_plan_replay(self):
+        directives = ['value 5 goes to bot 2',
+                      'bot 2 gives low to bot 1 and high to bot 0',
+                      'value 3 goes to bot 1',
+                      'bot 1 gives low to output 1 and high to bot 0',
+                      'bot 0 gives low to output 2 and high to output 0',
+                      'value 2 goes to bot 2']
+        plan = compile_bot_network(directives)
+        self.assertEqual(evaluate_plan(plan, plan_inputs(plan, directives)), [[5], [2], [3]])
+
+        inputs = [(plan.index[2], 10), (plan.index[2], 30), (plan.index[1], 20)]
+        self.assertEqual(evaluate_plan(plan, inputs), [[30], [10], [20]])
+
+    def test_plan_refill(self):
+        # bot 2 gives away its two values, then is refilled by bot 1
+        directives = ['value 5 goes to bot 1',
+                      'value 7 goes to bot 1',
+                      'bot 1 gives low to bot 2 and high to bot 2',
+                      'value 1 goes to bot 2',
+                      'value 9 goes to bot 2',
+                      'bot 2 gives low to output 0 and high to output 1']
+        bots_and_bins = create_bots_and_bins_from_directives(directives)
+        while perform_bots_step(bots_and_bins):
+            pass
+
+        plan = compile_bot_network(directives)
+        compares = []
+        outputs = evaluate_plan(plan, plan_inputs(plan, directives), lambda *compare: compares.append(compare))
+
+        self.assertEqual(outputs, [[1, 5], [9, 7]])
+        self.assertEqual(outputs, [bots_and_bins['output 0'].holding, bots_and_bins['output 1'].holding])
+        self.assertEqual(compares, [('bot 1', 5, 7), ('bot 2', 1, 9), ('bot 2', 5, 7)])
+
+    def test_plan_refill_several_sources(self):
+        # bots 2, 1 and 0 all give to bot 3, which pairs the chips in plan order and keeps the odd one
+        directives = ['value 5 goes to bot 2',
+                      'value 6 goes to bot 2',
+                      'value 3 goes to bot 1',
+                      'value 4 goes to bot 1',
+                      'value 1 goes to bot 0',
+                      'value 2 goes to bot 0',
+                      'bot 2 gives low to bot 3 and high to output 3',
+                      'bot 1 gives low to bot 3 and high to output 2',
+                      'bot 0 gives low to bot 3 and high to output 1',
+                      'bot 3 gives low to output 0 and high to output 0']
+        plan = compile_bot_network(directives)
+        self.assertEqual(plan.names, ['bot 2', 'bot 1', 'bot 0', 'bot 3'])
+
+        compares = []
+        outputs = evaluate_plan(plan, plan_inputs(plan, directives), lambda *compare: compares.append(compare))
+        self.assertEqual(outputs, [[3, 5], [2], [4], [6]])
+        self.assertEqual(compares[-1], ('bot 3', 3, 5))
+
+    def test_plan_cycle(self):
+        directives = ['bot 1 gives low to bot 2 and high to output 0', 'bot 2 gives low to bot 1 and high to output 1']
+        self.assertRaises(ValueError, compile_bot_network, directives)
+
+    def test_arrays_example(self):
+        directives = ['value 5 goes to bot 2',
+                      'bot 2 gives low to bot 1 and high to bot 0',
+                      'value 3 goes to bot 1',
+                      'bot 1 gives low to output 1 and high to bot 0',
+                      'bot 0 gives low to output 2 and high to output 0',
+                      'value 2 goes to bot 2']
+        network = BotNetworkArrays.from_directives(directives)
+        self.assertEqual(network.bot(1).holding, [3])
+        self.assertEqual(network.bot(2).holding, [5, 2])
+        self.assertEqual((network.bot(1).lowdest, network.bot(1).highdest), ('output 1', 'bot 0'))
+
+        compares = []
+        self.assertEqual(network.run(lambda *compare: compares.append(compare)), 3)
+        self.assertEqual(compares, [('bot 2', 2, 5), ('bot 1', 2, 3), ('bot 0', 3, 5)])
+        self.assertEqual(network.bot(0).holding, [])
+        self.assertEqual(network.output(2).holding, [3])
+        self.assertEqual(network.output_holdings(), {0: [5], 1: [2], 2: [3]})
+
+    def test_arrays_match_run_bots_random(self):
+        directives = generate_bot_network(300, seed=12)
+
+        bots_and_bins = create_bots_and_bins_from_directives(directives)
+        run_compares = []
+        run_bots(bots_and_bins, lambda *compare: run_compares.append(compare))
+
+        network = BotNetworkArrays.from_directives(directives)
+        array_compares = []
+        network.run(lambda *compare: array_compares.append(compare))
+
+        self.assertEqual(sorted(array_compares), sorted(run_compares))
+        self.assertEqual({'output ' + str(i): holding for i, holding in network.output_holdings().items()},
+                         {name: b.holding for name, b in bots_and_bins.items() if name.startswith('output')})
+
+
 if __name__ == '__main__':
     unittest.main()
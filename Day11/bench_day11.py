@@ -0,0 +1,32 @@
+import os
+import sys
+import timeit
+from functools import partial
+
+from day11 import day11a_solver, day11b_solver
+from day11 import find_shortest_move_sequence_endstate_batch, find_shortest_move_sequence_endstate_encoded
+from day11 import find_shortest_move_sequence_endstate_bidirectional, find_shortest_move_sequence_endstate_parallel
+
+# compare the State object batch BFS against the forward, bidirectional and parallel BFS over canonical state encodings
+# usage: python bench_day11.py [processes] [--with-batch-b]   (the State object BFS takes minutes on part b)
+
+
+if __name__ == '__main__':
+    batch = partial(find_shortest_move_sequence_endstate_batch, checkpointlog=False)
+    encoded = partial(find_shortest_move_sequence_endstate_encoded, checkpointlog=False)
+    bidirectional = partial(find_shortest_move_sequence_endstate_bidirectional, checkpointlog=False)
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else None
+    parallel = partial(find_shortest_move_sequence_endstate_parallel, checkpointlog=False, processes=processes)
+
+    for name, solver, runbatch in (('day11a', day11a_solver, True), ('day11b', day11b_solver, '--with-batch-b' in sys.argv)):
+        tencoded = timeit.timeit(lambda: solver(encoded), number=1)
+        assert solver(bidirectional) == solver(encoded)
+        tbidirectional = timeit.timeit(lambda: solver(bidirectional), number=1)
+        print('{}: encoded BFS {:.2f}s, bidirectional encoded BFS {:.2f}s'.format(name, tencoded, tbidirectional))
+        assert solver(parallel) == solver(encoded)
+        tparallel = timeit.timeit(lambda: solver(parallel), number=1)
+        print('{}: parallel encoded BFS {:.2f}s with {} processes'.format(name, tparallel, processes or os.cpu_count()))
+        if runbatch:
+            assert solver(batch) == solver(encoded)
+            tbatch = timeit.timeit(lambda: solver(batch), number=1)
+            print('{}: State batch BFS {:.2f}s, encoded BFS {:.2f}s ({:.0f}x)'.format(name, tbatch, tencoded, tbatch / tencoded))
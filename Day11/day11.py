@@ -1,4 +1,7 @@
+import array
 import itertools
+import multiprocessing
+import os
 from functools import partial
 
 class Generator(object):
@@ -200,7 +203,379 @@ def find_shortest_move_sequence_endstate_batch(startstate, checkpointlog = True)
         depth += 1
 
 
-default_solver_corefunc = find_shortest_move_sequence_endstate_batch
+# Canonical state encoding: each element is reduced to a (generator floor, microchip floor) pair, since elements with
+# the same pair of floors are interchangeable. The pairs are sorted and packed into a single int along with the
+# elevator floor, bits_per_floor bits for each floor number: the elevator in the lowest bits, then the generator and
+# microchip floor of each pair in turn. An element missing its generator or microchip uses nfloors as that floor.
+
+def bits_per_floor(nfloors):
+    return nfloors.bit_length()
+
+
+def encode_pairs(elevator_floor, pairs, bits):
+    """
+    :param pairs: list of (generator floor, microchip floor) tuples, in any order
+    :return: the canonical int for the state
+    """
+    code = elevator_floor
+    shift = bits
+    for generator_floor, chip_floor in sorted(pairs):
+        code |= ((generator_floor << bits) | chip_floor) << shift
+        shift += 2 * bits
+    return code
+
+
+def decode_pairs(code, npairs, bits):
+    """
+    :return: tuple of (elevator floor, list of (generator floor, microchip floor) tuples)
+    """
+    mask = (1 << bits) - 1
+    elevator_floor = code & mask
+    pairs = []
+    for i in range(npairs):
+        pair = code >> ((2 * i + 1) * bits)
+        pairs.append(((pair >> bits) & mask, pair & mask))
+    return elevator_floor, pairs
+
+
+def encode_state(state):
+    """
+    :param state: a State object
+    :return: the canonical int for the state (see encode_pairs)
+    """
+    floors = {}
+    for floor, items in enumerate(state.floors):
+        for item in items:
+            floors[(item.element, isinstance(item, Microchip))] = floor
+
+    nfloors = len(state.floors)
+    elements = set(element for element, _ in floors)
+    pairs = [(floors.get((element, False), nfloors), floors.get((element, True), nfloors)) for element in elements]
+    return encode_pairs(state.elevator_floor, pairs, bits_per_floor(nfloors))
+
+
+def are_pair_floors_compatible(pairs, floors):
+    """
+    Check that no microchip on the given floors is with another generator, without its own generator.
+    """
+    for generator_floor, chip_floor in pairs:
+        if chip_floor in floors and generator_floor != chip_floor:
+            if any(other_generator_floor == chip_floor for other_generator_floor, _ in pairs):
+                return False
+    return True
+
+
+def move_encoded_state(code, npairs, nfloors):
+    """
+    Given an encoded state, generate the encoded states for all the possible moves from that state (see
+    move_items_by_elevator).
+
+    :return: a set of ints
+    """
+    bits = bits_per_floor(nfloors)
+    elevator_floor, pairs = decode_pairs(code, npairs, bits)
+
+    # items on the elevator floor, as (pair index, 0 for the generator or 1 for the microchip)
+    items = [(i, side) for i, pair in enumerate(pairs) for side in (0, 1) if pair[side] == elevator_floor]
+
+    states = set()
+    for to_floor in (elevator_floor + 1, elevator_floor - 1):
+        if to_floor < 0 or to_floor >= nfloors:
+            continue
+
+        for n_items in range(1, 3):
+            for items_to_move in itertools.combinations(items, n_items):
+                moved = [list(pair) for pair in pairs]
+                for i, side in items_to_move:
+                    moved[i][side] = to_floor
+
+                if are_pair_floors_compatible(moved, (elevator_floor, to_floor)):
+                    states.add(encode_pairs(to_floor, moved, bits))
+
+    return states
+
+
+def state_for_encoded_path(startstate, codes):
+    """
+    Replay a sequence of encoded states as State objects, choosing a concrete move for each step.
+
+    :param startstate: State object for the first code
+    :param codes: list of encoded states, starting with the encoding of startstate
+    :return: the State for the last code, with parent links back to startstate
+    """
+    state = startstate
+    for code in codes[1:]:
+        state = next(s for s in move_items_by_elevator(state, set()) if encode_state(s) == code)
+    return state
+
+
+def encoded_start_and_end_states(startstate):
+    """
+    :return: tuple of (start code, end code, number of pairs, number of floors) for searching from startstate, where
+        the end state has every item (but not the missing ones) and the elevator on the top floor
+    """
+    nfloors = len(startstate.floors)
+    bits = bits_per_floor(nfloors)
+    startcode = encode_state(startstate)
+    npairs = len(set(item.element for floor in startstate.floors for item in floor))
+
+    _, startpairs = decode_pairs(startcode, npairs, bits)
+    endpairs = [tuple(nfloors - 1 if floor < nfloors else floor for floor in pair) for pair in startpairs]
+    endcode = encode_pairs(nfloors - 1, endpairs, bits)
+
+    return startcode, endcode, npairs, nfloors
+
+
+def find_shortest_move_sequence_endstate_encoded(startstate, checkpointlog = True):
+    """
+    Find the end-state of the lowest-depth move sequence using a batch-wise BFS over canonical state encodings, where
+    states that only differ by swapping elements are visited once.
+
+    :param startstate: The initial state to work from
+    :param checkpointlog: If True, prints some diagnostics before processing every batch
+    :return: a State object which is the end-state
+    :raises ValueError: if the end state cannot be reached
+    """
+    startcode, endcode, npairs, nfloors = encoded_start_and_end_states(startstate)
+
+    # the parent of each encoded state that has been reached, which is also the visited set
+    parents = {startcode: None}
+    active_states = [startcode]
+
+    depth = 0
+    while endcode not in parents:
+        if not active_states:
+            raise ValueError('no sequence of moves reaches the end state')
+
+        if checkpointlog:
+            print('nactive=' + str(len(active_states)) + ' depth=' + str(depth))
+
+        new_states = []
+        for code in active_states:
+            for new_code in move_encoded_state(code, npairs, nfloors):
+                if new_code not in parents:
+                    parents[new_code] = code
+                    new_states.append(new_code)
+        active_states = new_states
+
+        depth += 1
+
+    codes = [endcode]
+    while parents[codes[-1]] is not None:
+        codes.append(parents[codes[-1]])
+
+    return state_for_encoded_path(startstate, list(reversed(codes)))
+
+
+def find_shortest_move_sequence_endstate_bidirectional(startstate, checkpointlog = True):
+    """
+    Find the end-state of the lowest-depth move sequence using a BFS over canonical state encodings that searches
+    forward from the start state and backward from the end state, a whole depth at a time, always expanding the
+    smaller frontier. Every move can be undone, so the backward search uses the same moves as the forward one.
+
+    The first depth where the searches meet holds a shortest sequence: with no meeting so far, any path is longer than
+    the sum of the depths searched, so the shortest meeting found while expanding that depth is the best.
+
+    :param startstate: The initial state to work from
+    :param checkpointlog: If True, prints the frontier sizes before processing every batch
+    :return: a State object which is the end-state
+    :raises ValueError: if the end state cannot be reached
+    """
+    startcode, endcode, npairs, nfloors = encoded_start_and_end_states(startstate)
+    if startcode == endcode:
+        return startstate
+
+    # for each search, the depth and the neighbouring code (towards its start) of each state it has reached
+    forward = {startcode: (0, None)}
+    backward = {endcode: (0, None)}
+    forward_frontier = [startcode]
+    backward_frontier = [endcode]
+
+    depth = 0
+    meeting = None
+    while meeting is None:
+        if not forward_frontier or not backward_frontier:
+            raise ValueError('no sequence of moves reaches the end state')
+
+        if checkpointlog:
+            print('nforward=' + str(len(forward_frontier)) + ' nbackward=' + str(len(backward_frontier)) + ' depth=' + str(depth))
+
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, reached, other = forward_frontier, forward, backward
+        else:
+            frontier, reached, other = backward_frontier, backward, forward
+
+        new_states = []
+        best = None
+        for code in frontier:
+            newdepth = reached[code][0] + 1
+            for new_code in move_encoded_state(code, npairs, nfloors):
+                if new_code in reached:
+                    continue
+                reached[new_code] = (newdepth, code)
+                new_states.append(new_code)
+                if new_code in other and (best is None or newdepth + other[new_code][0] < best):
+                    best = newdepth + other[new_code][0]
+                    meeting = new_code
+
+        if frontier is forward_frontier:
+            forward_frontier = new_states
+        else:
+            backward_frontier = new_states
+
+        depth += 1
+
+    # follow the links from the meeting state back to the start, and on to the end
+    codes = [meeting]
+    while forward[codes[-1]][1] is not None:
+        codes.append(forward[codes[-1]][1])
+    codes.reverse()
+    while backward[codes[-1]][1] is not None:
+        codes.append(backward[codes[-1]][1])
+
+    return state_for_encoded_path(startstate, codes)
+
+
+# Parallel BFS over the encoded states: each worker process owns the slice of the visited states (with their parents)
+# whose codes hash to it, and the part of the frontier that it added to them. At every depth each worker expands its
+# own frontier and buckets the (child, parent) pairs by owner, sending each bucket straight to the owner's inbox. Each
+# owner filters the candidates it receives against its own visited states, which gives its part of the next frontier.
+# The search process only sees the frontier sizes, and whether the owner of the end state has reached it.
+
+no_parent_code = 0xFFFFFFFFFFFFFFFF
+
+
+def state_owner(code, nworkers):
+    # multiplicative hash, since the low bits of a code are just the elevator floor
+    return (((code * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32) % nworkers
+
+
+def frontier_worker(connection, inboxes, worker, npairs, nfloors, endcode):
+    """
+    Worker process loop for find_shortest_move_sequence_endstate_parallel, handling requests from the connection:
+
+    ('start', code): make code (which this worker owns) the start of the search
+    ('expand',): expand this worker's frontier, exchanging the candidates with the other workers through their inboxes,
+        and reply with (size of this worker's new frontier, whether endcode has been reached)
+    ('parent', code): reply with the parent of a visited code
+    ('stop',): exit
+
+    :param inboxes: a multiprocessing.Queue for each worker, receiving the bytes of arrays of (child, parent) pairs
+    """
+    nworkers = len(inboxes)
+    visited = {}
+    frontier = array.array('Q')
+
+    while True:
+        request = connection.recv()
+
+        if request[0] == 'start':
+            visited[request[1]] = no_parent_code
+            frontier.append(request[1])
+
+        elif request[0] == 'expand':
+            buckets = [array.array('Q') for _ in range(nworkers)]
+            for code in frontier:
+                for child in move_encoded_state(code, npairs, nfloors):
+                    bucket = buckets[state_owner(child, nworkers)]
+                    bucket.append(child)
+                    bucket.append(code)
+
+            # every worker sends every other worker one bucket per depth, even when it is empty
+            for owner, bucket in enumerate(buckets):
+                if owner != worker:
+                    inboxes[owner].put(bucket.tobytes())
+            candidates = buckets[worker]
+            for _ in range(nworkers - 1):
+                candidates.frombytes(inboxes[worker].get())
+
+            frontier = array.array('Q')
+            for i in range(0, len(candidates), 2):
+                child = candidates[i]
+                if child not in visited:
+                    visited[child] = candidates[i + 1]
+                    frontier.append(child)
+            connection.send((len(frontier), endcode in visited))
+
+        elif request[0] == 'parent':
+            connection.send(visited[request[1]])
+
+        else:
+            break
+
+
+def find_shortest_move_sequence_endstate_parallel(startstate, checkpointlog = True, processes = None):
+    """
+    Find the end-state of the lowest-depth move sequence using a batch-wise BFS over canonical state encodings, split
+    across a set of worker processes that last for the whole search (see frontier_worker).
+
+    :param startstate: The initial state to work from
+    :param checkpointlog: If True, prints some diagnostics before processing every batch
+    :param processes: number of worker processes (defaults to the number of cores)
+    :return: a State object which is the end-state
+    :raises ValueError: if the end state cannot be reached
+    """
+    startcode, endcode, npairs, nfloors = encoded_start_and_end_states(startstate)
+    assert bits_per_floor(nfloors) * (2 * npairs + 1) <= 64, "Encoded states must fit in 64 bits"
+    if startcode == endcode:
+        return startstate
+
+    nworkers = processes or os.cpu_count()
+    inboxes = [multiprocessing.Queue() for _ in range(nworkers)]
+    connections = []
+    workers = []
+
+    try:
+        for worker in range(nworkers):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=frontier_worker,
+                                              args=(worker_connection, inboxes, worker, npairs, nfloors, endcode),
+                                              daemon=True)
+            process.start()
+            connections.append(connection)
+            workers.append(process)
+
+        connections[state_owner(startcode, nworkers)].send(('start', startcode))
+        nactive = 1
+        endowner = state_owner(endcode, nworkers)
+
+        depth = 0
+        while True:
+            if not nactive:
+                raise ValueError('no sequence of moves reaches the end state')
+
+            if checkpointlog:
+                print('nactive=' + str(nactive) + ' depth=' + str(depth))
+
+            for connection in connections:
+                connection.send(('expand',))
+            replies = [connection.recv() for connection in connections]
+            nactive = sum(nnew for nnew, _ in replies)
+
+            depth += 1
+
+            if replies[endowner][1]:
+                break
+
+        # follow the parents back from the end state, asking the owner of each state
+        codes = [endcode]
+        while True:
+            connection = connections[state_owner(codes[-1], nworkers)]
+            connection.send(('parent', codes[-1]))
+            parent = connection.recv()
+            if parent == no_parent_code:
+                break
+            codes.append(parent)
+    finally:
+        for connection in connections:
+            connection.send(('stop',))
+        for process in workers:
+            process.join()
+
+    return state_for_encoded_path(startstate, list(reversed(codes)))
+
+
+default_solver_corefunc = find_shortest_move_sequence_endstate_encoded
 
 
 def find_shortest_move_sequence(startstate, corefunc = default_solver_corefunc):
@@ -208,7 +583,7 @@ def find_shortest_move_sequence(startstate, corefunc = default_solver_corefunc):
     Find the shortest sequence of moves to place all the generators and microprocessors on the topmost floor.
 
     :param startstate: State object with the initial placement of microprocessors and generators
-    :param corefunc: An alternative function for finding the solution state. The default does a simple batch-BFS.
+    :param corefunc: An alternative function for finding the solution state. The default does a batch-BFS over canonical state encodings.
     :return: a list of State objects, starting with the start state plus one for each move made, ending in the solution state
     """
     # find the end-state
@@ -1,6 +1,21 @@
+import random
 import unittest
+from functools import partial
 
 from day11 import State, Generator, Microchip, find_shortest_move_sequence, does_floor_contain_only_compatible_items, move_items_by_elevator_between_floors
+from day11 import find_shortest_move_sequence_endstate_batch, find_shortest_move_sequence_endstate_encoded, encode_state, is_end_state
+from day11 import find_shortest_move_sequence_endstate_bidirectional, find_shortest_move_sequence_endstate_parallel
+
+
+def random_start_state(rng, nelements, nfloors=4):
+    # items on random floors, retrying until no microchip starts out fried and the elevator has something to carry
+    while True:
+        floors = [set() for _ in range(nfloors)]
+        for element in range(nelements):
+            floors[rng.randrange(nfloors - 1)].add(Generator(str(element)))
+            floors[rng.randrange(nfloors - 1)].add(Microchip(str(element)))
+        if floors[0] and all(does_floor_contain_only_compatible_items(floor) for floor in floors):
+            return State(floors)
 
 
 def unordered_lists_equal(a,b):
@@ -158,5 +173,71 @@ class Day11Tests(unittest.TestCase):
             self.assertEqual(len(moves), 12)        # 11 + 1 for the initial state
 
 
+class Day11EncodedTests(unittest.TestCase):
+
+    def test_encoding_ignores_element_names(self):
+        a = State([{Generator('hydrogen'), Microchip('lithium')}, {Microchip('hydrogen')}, {Generator('lithium')}])
+        b = State([{Generator('lithium'), Microchip('hydrogen')}, {Microchip('lithium')}, {Generator('hydrogen')}])
+        c = State([{Generator('hydrogen'), Microchip('lithium')}, {Microchip('hydrogen')}, {Generator('lithium')}], elevator_floor=1)
+        self.assertEqual(encode_state(a), encode_state(b))
+        self.assertNotEqual(encode_state(a), encode_state(c))
+
+    def test_example(self):
+        startstate = State([{Microchip('hydrogen'), Microchip('lithium')},
+                            {Generator('hydrogen')},
+                            {Generator('lithium')},
+                            set()
+                           ])
+        moves = find_shortest_move_sequence(startstate, partial(find_shortest_move_sequence_endstate_encoded, checkpointlog=False))
+        self.assertEqual(len(moves), 12)
+        self.assertTrue(is_end_state(moves[-1]))
+
+    def test_matches_batch_random(self):
+        rng = random.Random(11)
+        for _ in range(10):
+            startstate = random_start_state(rng, rng.randint(1, 3))
+            expected = find_shortest_move_sequence(startstate, partial(find_shortest_move_sequence_endstate_batch, checkpointlog=False))
+            moves = find_shortest_move_sequence(startstate, partial(find_shortest_move_sequence_endstate_encoded, checkpointlog=False))
+            self.assertEqual(len(moves), len(expected))
+            self.assertIs(moves[0], startstate)
+            self.assertTrue(is_end_state(moves[-1]))
+
+    def test_bidirectional_matches_encoded_random(self):
+        rng = random.Random(24)
+        for _ in range(20):
+            startstate = random_start_state(rng, rng.randint(1, 4))
+            expected = find_shortest_move_sequence(startstate, partial(find_shortest_move_sequence_endstate_encoded, checkpointlog=False))
+            moves = find_shortest_move_sequence(startstate, partial(find_shortest_move_sequence_endstate_bidirectional, checkpointlog=False))
+            self.assertEqual(len(moves), len(expected))
+            self.assertIs(moves[0], startstate)
+            self.assertTrue(is_end_state(moves[-1]))
+            for before, after in zip(moves, moves[1:]):
+                self.assertIs(after.parent, before)
+
+    def test_unreachable_end_state(self):
+        # the elevator is on an empty floor, so there are no moves at all
+        startstate = State([set(), {Generator('hydrogen'), Microchip('hydrogen')}, set(), set()])
+        for corefunc in (find_shortest_move_sequence_endstate_encoded, find_shortest_move_sequence_endstate_bidirectional,
+                         partial(find_shortest_move_sequence_endstate_parallel, processes=2)):
+            self.assertRaises(ValueError, find_shortest_move_sequence, startstate, partial(corefunc, checkpointlog=False))
+
+    def test_parallel_matches_encoded_random(self):
+        rng = random.Random(25)
+        for processes in (1, 3):
+            for _ in range(3):
+                # larger random starts can have no solution, so keep trying until one does
+                while True:
+                    startstate = random_start_state(rng, rng.randint(2, 4))
+                    try:
+                        expected = find_shortest_move_sequence(startstate, partial(find_shortest_move_sequence_endstate_encoded, checkpointlog=False))
+                        break
+                    except ValueError:
+                        pass
+                moves = find_shortest_move_sequence(startstate, partial(find_shortest_move_sequence_endstate_parallel, checkpointlog=False, processes=processes))
+                self.assertEqual(len(moves), len(expected))
+                self.assertIs(moves[0], startstate)
+                self.assertTrue(is_end_state(moves[-1]))
+
+
 if __name__ == '__main__':
     unittest.main()
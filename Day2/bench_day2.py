@@ -0,0 +1,44 @@
+import random
+import timeit
+
+from day2 import solver, compiled_solver, parallel_solver
+from day2 import keypad_position_after_move_13digit, keypad_transition_table_13digit
+
+# compare the compiled transition-table solver against the dictionary state-machine solver on large instruction lists
+
+
+def bench(nlines, linelength):
+    rng = random.Random(0)
+    instructionlist = [''.join(rng.choice('UDLR') for _ in range(linelength)) for _ in range(nlines)]
+
+    for statemachine, table in ((None, None), (keypad_position_after_move_13digit, keypad_transition_table_13digit)):
+        args = (instructionlist, statemachine) if statemachine else (instructionlist,)
+        compiledargs = (instructionlist, table) if table else (instructionlist,)
+        assert solver(*args) == compiled_solver(*compiledargs)
+
+        tsolver = timeit.timeit(lambda: solver(*args), number=1)
+        tcompiled = min(timeit.repeat(lambda: compiled_solver(*compiledargs), number=1, repeat=3))
+        print('{} lines of {} moves, {}-digit keypad: compiled_solver {:.3f}s, solver {:.3f}s ({:.1f}x)'.format(
+            nlines, linelength, 13 if table else 9, tcompiled, tsolver, tsolver / tcompiled))
+
+
+def bench_parallel(linelength, processcounts):
+    rng = random.Random(1)
+    instructionlist = [''.join(rng.choices('UDLR', k=linelength))]
+
+    expected = solver(instructionlist)
+    tsolver = timeit.timeit(lambda: solver(instructionlist), number=1)
+    tcompiled = timeit.timeit(lambda: compiled_solver(instructionlist), number=1)
+    print('1 line of {} moves: solver {:.3f}s, compiled_solver {:.3f}s'.format(linelength, tsolver, tcompiled))
+
+    for processes in processcounts:
+        assert parallel_solver(instructionlist, processes=processes) == expected
+        tparallel = min(timeit.repeat(lambda: parallel_solver(instructionlist, processes=processes), number=1, repeat=3))
+        print('    parallel_solver with {} processes {:.3f}s ({:.1f}x compiled_solver)'.format(
+            processes, tparallel, tcompiled / tparallel))
+
+
+if __name__ == '__main__':
+    bench(5, 1000000)
+    bench(1000, 5000)
+    bench_parallel(50000000, (1, 2, 4, 8))
@@ -2,6 +2,8 @@
 # solution for the second puzzle of Advent of Code: http://adventofcode.com/2016/day/2
 #
 
+import collections
+import multiprocessing
 import numpy as np
 
 # permitted keypad move directions
@@ -61,6 +63,163 @@ keypad_position_after_move_13digit = keypad_to_state_machine(['  1  ',
                                                               ' ABC ',
                                                               '  D  '])
 
+# move ids used to index the transition tables, in the same order as keypad_move_offsets
+# any other character (e.g. a stray '\r') gets the extra 'stay' move id, which never changes key
+keypad_move_ids = {move: i for i, move in enumerate(keypad_move_offsets)}
+keypad_stay_move_id = len(keypad_move_ids)
+
+# lookup from an ascii byte to its move id
+keypad_move_id_lookup = np.full(256, keypad_stay_move_id, dtype=np.uint8)
+for move, move_id in keypad_move_ids.items():
+    keypad_move_id_lookup[ord(move)] = move_id
+
+# number of moves pre-composed into each entry of a transition table's chunk table
+keypad_chunk_moves = 6
+
+# a dense, integer-indexed form of a keypad state machine
+#   keys: string of the key labels, indexed by key id
+#   table: uint8 ndarray such that table[key_id, move_id] is the key id reached by making the move
+#   chunktable: uint8 ndarray such that chunktable[chunk_id, key_id] is the key id reached by making a run of
+#               keypad_chunk_moves moves, where chunk_id packs the run's move ids as base-(nmoves) digits (first move
+#               most significant)
+KeypadTransitionTable = collections.namedtuple('KeypadTransitionTable', ['keys', 'table', 'chunktable'])
+
+
+def state_machine_to_transition_table(statemachine):
+    """
+    Build a dense transition table from a keypad state machine (see keypad_to_state_machine).
+
+    :param statemachine: a dictionary d such that d[key][direction], if present, gives the key we reach after moving in direction
+    :return: a KeypadTransitionTable for the same keypad
+    """
+    keys = "".join(statemachine.keys())
+    key_ids = {key: i for i, key in enumerate(keys)}
+
+    # every move starts off staying put, and is then overridden wherever the state machine has a transition
+    table = np.tile(np.arange(len(keys), dtype=np.uint8)[:, np.newaxis], (1, keypad_stay_move_id + 1))
+    for key, transitions in statemachine.items():
+        for move, key_at_move in transitions.items():
+            table[key_ids[key], keypad_move_ids[move]] = key_ids[key_at_move]
+
+    # pre-compose every run of keypad_chunk_moves moves, extending the runs by one move at a time
+    chunktable = np.arange(len(keys), dtype=np.uint8)[np.newaxis, :]
+    for _ in range(keypad_chunk_moves):
+        chunktable = table.T[:, chunktable].swapaxes(0, 1).reshape(-1, len(keys))
+
+    return KeypadTransitionTable(keys, table, chunktable)
+
+
+keypad_transition_table_9digit = state_machine_to_transition_table(keypad_position_after_move_9digit)
+keypad_transition_table_13digit = state_machine_to_transition_table(keypad_position_after_move_13digit)
+
+
+def compose_key_functions(functions):
+    """
+    Compose a sequence of key-to-key functions into the single function that applies them all in order.
+
+    Adjacent pairs are composed with one vectorised gather per level, so n functions take log2(n) numpy steps.
+
+    :param functions: an n x nkeys ndarray, where functions[i, k] is the key id function i maps key id k to
+    :return: a length nkeys ndarray mapping each key id to the key id after applying every function in turn
+    """
+    nkeys = functions.shape[1]
+    identity = np.arange(nkeys, dtype=functions.dtype)
+    if len(functions) == 0:
+        return identity
+
+    while len(functions) > 1:
+        if len(functions) % 2:
+            functions = np.vstack((functions, identity))
+        # apply each even function first, then the odd function that follows it
+        functions = np.take_along_axis(functions[1::2], functions[0::2], axis=1)
+
+    return functions[0]
+
+
+def instruction_line_function(instructionline, transitiontable):
+    """
+    Reduce a line of keypad moves to the function from starting key to finishing key, so that it can be
+    applied to any starting key in O(1). The moves are looked up a chunk at a time in the pre-composed chunk table,
+    and the chunk functions are then composed together with compose_key_functions().
+
+    :param instructionline: a string containing keypad moves
+    :param transitiontable: the KeypadTransitionTable to make the moves on
+    :return: a length nkeys ndarray mapping each starting key id to the key id reached after all the moves
+    """
+    moves = keypad_move_id_lookup[np.frombuffer(instructionline.encode('ascii'), dtype=np.uint8)]
+
+    # pad with 'stay' moves to whole chunks, and look up the pre-composed function of each chunk
+    nmoves = keypad_stay_move_id + 1
+    moves = np.append(moves, np.full(-len(moves) % keypad_chunk_moves, keypad_stay_move_id, dtype=np.uint8))
+    chunk_ids = moves.reshape(-1, keypad_chunk_moves).astype(np.int32) @ \
+                (nmoves ** np.arange(keypad_chunk_moves - 1, -1, -1, dtype=np.int32))
+
+    return compose_key_functions(transitiontable.chunktable[chunk_ids])
+
+
+def compiled_solver(instructionlist, transitiontable = keypad_transition_table_9digit):
+    """
+    Process a keycode instruction list and determine the keycode, using a dense transition table.
+    Gives the same keycode as solver(), but each line is reduced to a key-to-key function with numpy.
+
+    :param instructionlist: a list of strings containing keypad moves
+    :param transitiontable: the KeypadTransitionTable of the keypad
+    :return: a string containing the keypad code
+    """
+    # start at key '5' and an empty keycode
+    currentkey = transitiontable.keys.index('5')
+    keycode = []
+
+    for instructionline in instructionlist:
+        currentkey = instruction_line_function(instructionline, transitiontable)[currentkey]
+        keycode.append(transitiontable.keys[currentkey])
+
+    return "".join(keycode)
+
+
+def pool_set_transition_table(transitiontable):
+    global g_transitiontable
+    g_transitiontable = transitiontable
+
+
+def pool_call_instruction_line_function(instructionchunk):
+    global g_transitiontable
+    return instruction_line_function(instructionchunk, g_transitiontable)
+
+
+def parallel_solver(instructionlist, transitiontable = keypad_transition_table_9digit, processes = None,
+                    chunklength = 1 << 20):
+    """
+    Process a keycode instruction list and determine the keycode, splitting very long lines across a process pool.
+    Gives the same keycode as solver().
+
+    Each line is split into chunks of chunklength moves, and every chunk is reduced to its key-to-key function
+    (see instruction_line_function) in a worker process. The chunk functions come back in order and are folded into
+    the function of the whole line, which is then applied to the current key.
+
+    :param instructionlist: a list of strings containing keypad moves
+    :param transitiontable: the KeypadTransitionTable of the keypad
+    :param processes: number of worker processes (defaults to the number of cores)
+    :param chunklength: number of moves in each chunk handed to a worker
+    :return: a string containing the keypad code
+    """
+    currentkey = transitiontable.keys.index('5')
+    keycode = []
+
+    with multiprocessing.Pool(processes=processes, initializer=pool_set_transition_table,
+                              initargs=(transitiontable,)) as pool:
+        for instructionline in instructionlist:
+            chunks = [instructionline[i:i + chunklength] for i in range(0, len(instructionline), chunklength)]
+            chunkfunctions = pool.map(pool_call_instruction_line_function, chunks)
+
+            chunkfunctions = np.array(chunkfunctions, dtype=np.uint8).reshape(-1, len(transitiontable.keys))
+            linefunction = compose_key_functions(chunkfunctions)
+            currentkey = linefunction[currentkey]
+            keycode.append(transitiontable.keys[currentkey])
+
+    return "".join(keycode)
+
+
 def solver(instructionlist, keypad_position_after_move = keypad_position_after_move_9digit):
     """
     Process a keycode instruction list and determine the keycode.
@@ -94,4 +253,6 @@ if __name__ == '__main__':
 
     print(solver(instructionlist))
     print(solver(instructionlist, keypad_position_after_move_13digit))
+    print(compiled_solver(instructionlist))
+    print(compiled_solver(instructionlist, keypad_transition_table_13digit))
 
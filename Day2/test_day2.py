@@ -1,6 +1,9 @@
 import unittest
+import random
 
-from day2 import solver
+from day2 import solver, compiled_solver, parallel_solver, instruction_line_function
+from day2 import keypad_position_after_move_9digit, keypad_position_after_move_13digit
+from day2 import keypad_transition_table_9digit, keypad_transition_table_13digit
 
 class Day2ASolverTest(unittest.TestCase):
 
@@ -53,5 +56,42 @@ class Day2ASolverTest(unittest.TestCase):
         code = solver(example)
         self.assertEqual(code, '1985')
 
+class Day2CompiledSolverTest(unittest.TestCase):
+
+    def test_example1(self):
+        example = ['ULL', 'RRDDD', 'LURDL', 'UUUUD']
+        self.assertEqual(compiled_solver(example), '1985')
+        self.assertEqual(compiled_solver(example, keypad_transition_table_13digit), '5DB3')
+
+    def test_matches_solver_random(self):
+        rng = random.Random(3)
+        for length in (0, 1, 2, 3, 7, 100, 1001):
+            instructionlist = [''.join(rng.choice('UDLR') for _ in range(length)) for _ in range(10)]
+            self.assertEqual(compiled_solver(instructionlist), solver(instructionlist))
+            self.assertEqual(compiled_solver(instructionlist, keypad_transition_table_13digit),
+                             solver(instructionlist, keypad_position_after_move_13digit))
+
+    def test_line_function(self):
+        # every starting key should end up where stepping through the moves takes it
+        line = 'ULLDRRDRU\r'
+        for table, statemachine in ((keypad_transition_table_9digit, keypad_position_after_move_9digit),
+                                    (keypad_transition_table_13digit, keypad_position_after_move_13digit)):
+            function = instruction_line_function(line, table)
+            for key_id, key in enumerate(table.keys):
+                for move in line:
+                    key = statemachine[key].get(move, key)
+                self.assertEqual(table.keys[function[key_id]], key)
+
+class Day2ParallelSolverTest(unittest.TestCase):
+
+    def test_matches_solver(self):
+        rng = random.Random(4)
+        instructionlist = [''.join(rng.choice('UDLR') for _ in range(length)) for length in (0, 5, 999, 10000, 12345)]
+
+        for chunklength in (1, 7, 1000, 100000):
+            self.assertEqual(parallel_solver(instructionlist, processes=2, chunklength=chunklength), solver(instructionlist))
+        self.assertEqual(parallel_solver(instructionlist, keypad_transition_table_13digit, processes=2, chunklength=500),
+                         solver(instructionlist, keypad_position_after_move_13digit))
+
 if __name__ == '__main__':
     unittest.main()
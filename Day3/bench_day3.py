@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+from day3 import checkvalid, count_valid_triangles_in_file
+
+# time the streaming validator on a large generated input, and the list-based checkvalid() filter on the same file
+# usage: python bench_day3.py [ntriangles]     (e.g. 100000000 for a ~1.5GB input)
+
+
+def write_triangles(filename, ntriangles, chunktriangles=1 << 20):
+    rng = np.random.default_rng(0)
+    with open(filename, 'w') as outfile:
+        for start in range(0, ntriangles, chunktriangles):
+            sides = rng.integers(1, 1000, size=(min(chunktriangles, ntriangles - start), 3))
+            np.savetxt(outfile, sides, fmt='%5d')
+
+
+def count_with_checkvalid(filename):
+    with open(filename, 'r') as infile:
+        return sum(1 for line in infile if checkvalid([int(y) for y in line.split()]))
+
+
+if __name__ == '__main__':
+    ntriangles = int(sys.argv[1]) if len(sys.argv) > 1 else 3 * 10 ** 6
+
+    fd, filename = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        write_triangles(filename, ntriangles)
+        print('{} triangles, {:.1f}MB'.format(ntriangles, os.path.getsize(filename) / 1e6))
+
+        for columns in (False, True):
+            count = count_valid_triangles_in_file(filename, columns)
+            t = timeit.timeit(lambda: count_valid_triangles_in_file(filename, columns), number=1)
+            print('count_valid_triangles_in_file(columns={}): {} valid in {:.2f}s ({:.1f}M triangles/s)'.format(
+                columns, count, t, ntriangles / t / 1e6))
+
+        if ntriangles <= 10 ** 7:
+            count = count_with_checkvalid(filename)
+            t = timeit.timeit(lambda: count_with_checkvalid(filename), number=1)
+            print('checkvalid per line: {} valid in {:.2f}s ({:.1f}M triangles/s)'.format(
+                count, t, ntriangles / t / 1e6))
+    finally:
+        os.remove(filename)
@@ -50,6 +50,96 @@ def partB():
     partA(translate)
 
 
+# vectorised, streaming validator
+#
+# the input is parsed in bulk straight into int32 arrays of shape (n, 3), a block of whole lines at a time, so that
+# arbitrarily large inputs only need memory proportional to the block size
+
+def parse_triangles(text):
+    """
+    Parse whitespace separated triangle side lengths into an (n, 3) int32 array.
+
+    :param text: string (or bytes) with three side lengths per triangle
+    :return: an (n, 3) ndarray, one row per triangle
+    """
+    return np.fromstring(text, dtype=np.int32, sep=' ').reshape(-1, 3)
+
+
+def iter_triangle_chunks(filename, chunkbytes=1 << 24):
+    """
+    Read a file of triangle side lengths a block of whole lines at a time.
+
+    :param filename: file with three side lengths per line
+    :param chunkbytes: approximate number of bytes to parse at a time
+    :return: a generator of (n, 3) int32 ndarrays
+    """
+    with open(filename, 'rb') as infile:
+        remainder = b''
+        while True:
+            block = infile.read(chunkbytes)
+            if not block:
+                break
+
+            # hold back any partial line at the end of the block until the next block is read
+            block = remainder + block
+            lastline = block.rfind(b'\n') + 1
+            remainder = block[lastline:]
+            if lastline:
+                yield parse_triangles(block[:lastline])
+
+        if remainder.strip():
+            yield parse_triangles(remainder)
+
+
+def columns_to_triangles(triangles):
+    """
+    Regroup triangles listed down the columns of each block of three rows (see partB) into one triangle per row.
+
+    :param triangles: an (n, 3) ndarray, where n is a multiple of 3
+    :return: an (n, 3) ndarray with each 3x3 block transposed
+    """
+    assert(len(triangles) % 3 == 0)
+    return triangles.reshape(-1, 3, 3).transpose(0, 2, 1).reshape(-1, 3)
+
+
+def count_valid_triangles(triangles):
+    """
+    Count the valid triangles in an array of side lengths: once the sides of a triangle are sorted, it is only
+    valid if the two shorter sides sum to more than the longest.
+
+    :param triangles: an (n, 3) ndarray of side lengths
+    :return: the number of valid triangles
+    """
+    sides = np.sort(triangles, axis=1).astype(np.int64)
+    return int(np.count_nonzero(sides[:, 0] + sides[:, 1] > sides[:, 2]))
+
+
+def count_valid_triangles_in_file(filename, columns=False, chunkbytes=1 << 24):
+    """
+    Count the valid triangles in a file, streaming it in fixed size blocks.
+
+    :param filename: file with three side lengths per line
+    :param columns: if True, the triangles are listed down the columns of each block of three lines (as in partB)
+    :param chunkbytes: approximate number of bytes to process at a time
+    :return: the number of valid triangles
+    """
+    count = 0
+    leftover = np.zeros((0, 3), dtype=np.int32)
+    for triangles in iter_triangle_chunks(filename, chunkbytes):
+        if columns:
+            # whole 3-line blocks are needed to regroup the columns, so carry any extra lines into the next chunk
+            triangles = np.concatenate((leftover, triangles))
+            nwhole = len(triangles) - len(triangles) % 3
+            triangles, leftover = columns_to_triangles(triangles[:nwhole]), triangles[nwhole:]
+        count += count_valid_triangles(triangles)
+
+    assert(len(leftover) == 0)
+    return count
+
+
 if __name__ == '__main__':
     partA()
     partB()
+
+    print(count_valid_triangles_in_file('input_3a.txt'))
+    print(count_valid_triangles_in_file('input_3a.txt', columns=True))
@@ -0,0 +1,48 @@
+import unittest
+import os
+import random
+import tempfile
+
+import numpy as np
+
+from day3 import checkvalid, parse_triangles, columns_to_triangles, count_valid_triangles, count_valid_triangles_in_file
+
+class Day3Tests(unittest.TestCase):
+
+    def test_example(self):
+        # In your puzzle input, and instead of the usual triangles, the specified sides are 5 10 25 ...
+        # you would say that's not a triangle
+        self.assertEqual(count_valid_triangles(parse_triangles('5 10 25')), 0)
+        self.assertEqual(count_valid_triangles(parse_triangles('  25 10 16\n 3 4 5\n')), 2)
+
+    def test_columns(self):
+        # In the example given, 101 301 501 are one triangle, 102 302 502 are another, ...
+        triangles = parse_triangles('101 301 501\n'
+                                    '102 302 502\n'
+                                    '103 303 503\n'
+                                    '201 401 601\n'
+                                    '202 402 602\n'
+                                    '203 403 603\n')
+        self.assertEqual(columns_to_triangles(triangles).tolist(),
+                         [[101, 102, 103], [301, 302, 303], [501, 502, 503],
+                          [201, 202, 203], [401, 402, 403], [601, 602, 603]])
+
+    def test_chunked_file_matches_checkvalid(self):
+        rng = random.Random(5)
+        triangles = [[rng.randint(1, 999) for _ in range(3)] for _ in range(999)]
+        columns = columns_to_triangles(np.array(triangles)).tolist()
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as outfile:
+            for t in triangles:
+                outfile.write('  {:3d}  {:3d}  {:3d}\n'.format(*t))
+        try:
+            for chunkbytes in (1, 5, 17, 18, 100, 1 << 20):
+                self.assertEqual(count_valid_triangles_in_file(outfile.name, chunkbytes=chunkbytes),
+                                 len(list(filter(checkvalid, triangles))))
+                self.assertEqual(count_valid_triangles_in_file(outfile.name, True, chunkbytes=chunkbytes),
+                                 len(list(filter(checkvalid, columns))))
+        finally:
+            os.remove(outfile.name)
+
+if __name__ == '__main__':
+    unittest.main()
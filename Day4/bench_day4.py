@@ -0,0 +1,54 @@
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from day4 import compute_checksum, compute_letter_checksum, day4a_solver, day4b_solver, day4_solver, day4_parallel_solver
+from day4 import decrypt_room_name, rooms_mentioning
+
+# time the checksum functions, and the list solvers against the chunked process-pool solver on a generated file
+# usage: python bench_day4.py [nrooms] [processes]
+
+
+def generate_room_ids(nrooms):
+    rng = random.Random(0)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    room_ids = []
+    for _ in range(nrooms):
+        name = '-'.join(''.join(rng.choices(letters, k=rng.randint(3, 10))) for _ in range(rng.randint(2, 5)))
+        checksum = compute_letter_checksum(name) if rng.random() < 0.6 else ''.join(rng.sample(letters, 5))
+        room_ids.append('{}-{}[{}]'.format(name, rng.randint(100, 999), checksum))
+    return room_ids
+
+
+if __name__ == '__main__':
+    nrooms = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    room_ids = generate_room_ids(nrooms)
+    names = [room_id.rsplit('-', 1)[0] for room_id in room_ids[:100000]]
+
+    for checksum in (compute_checksum, compute_letter_checksum):
+        t = timeit.timeit(lambda: [checksum(name) for name in names], number=1)
+        print('{}: {:.2f}us per name'.format(checksum.__name__, t / len(names) * 1e6))
+
+    rooms = [tuple(room_id.split('[')[0].rsplit('-', 1)) for room_id in room_ids[:100000]]
+    t = timeit.timeit(lambda: [decrypt_room_name(name, int(sector)) for name, sector in rooms], number=1)
+    print('decrypt_room_name: {:.2f}us per name'.format(t / len(rooms) * 1e6))
+    t = timeit.timeit(lambda: rooms_mentioning(rooms, 'north'), number=1)
+    print('rooms_mentioning: {:.2f}us per name'.format(t / len(rooms) * 1e6))
+
+    t = timeit.timeit(lambda: (day4a_solver(room_ids), day4b_solver(room_ids)), number=1)
+    print('day4a_solver + day4b_solver on {} rooms: {:.2f}s'.format(nrooms, t))
+    t = timeit.timeit(lambda: day4_solver(room_ids), number=1)
+    print('day4_solver on {} rooms (parsing once): {:.2f}s'.format(nrooms, t))
+
+    fd, filename = tempfile.mkstemp(suffix='.txt')
+    with os.fdopen(fd, 'w') as outfile:
+        outfile.write('\n'.join(room_ids) + '\n')
+    try:
+        t = timeit.timeit(lambda: day4_parallel_solver(filename, processes), number=1)
+        print('day4_parallel_solver on {} rooms from file ({} processes): {:.2f}s'.format(
+            nrooms, processes or os.cpu_count(), t))
+    finally:
+        os.remove(filename)
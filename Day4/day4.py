@@ -3,6 +3,14 @@
 #
 
 import re
+import collections
+import itertools
+import multiprocessing
+import numpy as np
+
+
+room_id_re = re.compile(r'^([a-z-]+)-([0-9]+)\[([a-z]+)\]$')
+room_id_lines_re = re.compile(room_id_re.pattern, re.MULTILINE)
 
 
 def parse_room_id(room_id):
@@ -12,7 +20,7 @@ def parse_room_id(room_id):
     :param room_id: A room id (e.g. 'aaaaa-bbb-z-y-x-123[abxyz]')
     :return: A tuple of string (name, sector, checksum)
     """
-    result = re.match('^([a-z-]+)-([0-9]+)\[([a-z]+)\]$', room_id)
+    result = room_id_re.match(room_id)
     if result is None:
         return None, None, None
 
@@ -44,6 +52,52 @@ def compute_checksum(name, skip='-'):
     checksum = "".join([x[0] for x in itemsbyfrequency[0:5]])
     return checksum
 
+# the letters that can appear in a room name, in checksum tie-break order
+alphabet = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def compute_letter_checksum(name):
+    """
+    Compute the room checksum from a room name made up of lowercase letters and '-' (as accepted by parse_room_id),
+    using a 26-slot table of letter counts instead of building a frequency dictionary.
+
+    :param name: the room name to produce the checksum for
+    :return: checksum string
+    """
+    counts = [name.count(c) for c in alphabet]
+
+    # sorted() is stable, so letters with equal counts stay in alphabetical order
+    letters = sorted(range(len(alphabet)), key=counts.__getitem__, reverse=True)[0:5]
+    return "".join([alphabet[i] for i in letters if counts[i]])
+
+
+# a parsed room id, along with whether its checksum matches the one computed from its name
+Room = collections.namedtuple('Room', ['name', 'sector', 'checksum', 'valid'])
+
+
+def parse_room(room_id):
+    """
+    Parse a room id and check its checksum.
+
+    :param room_id: A room id (e.g. 'aaaaa-bbb-z-y-x-123[abxyz]')
+    :return: a Room, or None if the room id could not be parsed
+    """
+    name, sector, checksum = parse_room_id(room_id)
+    if name is None:
+        return None
+
+    return Room(name, sector, checksum, checksum == compute_letter_checksum(name))
+
+
+def valid_rooms(room_ids):
+    """
+    :param room_ids: list of room id strings
+    :return: a list of the Rooms whose checksums are valid
+    """
+    rooms = [parse_room(room_id) for room_id in room_ids]
+    return [room for room in rooms if room is not None and room.valid]
+
+
 def day4a_solver(room_ids):
     """
     Find the total of the sector id's of the valid room_ids
@@ -52,16 +106,17 @@ def day4a_solver(room_ids):
     :return: total of the sector id's
     """
 
-    # parse all the room id's into their parts
-    room_tuples = [parse_room_id(room_id) for room_id in room_ids]
+    # sum the sector_ids of the rooms whose expected checksums match the computed ones
+    sum_sector_ids = sum([int(room.sector) for room in valid_rooms(room_ids)])
 
-    # filter by those whose expected checksums match the computed ones
-    valid_tuples = [(n, s, ec) for n, s, ec in room_tuples if ec == compute_checksum(n)]
+    return sum_sector_ids
 
-    # sum the sector_ids
-    sum_sector_ids = sum([int(s) for n, s, ec in valid_tuples ])
 
-    return sum_sector_ids
+# str.translate tables for each of the 26 possible shifts, which also turn the '-' separators into spaces
+decrypt_tables = [str.maketrans(alphabet + '-', alphabet[shift:] + alphabet[:shift] + ' ') for shift in range(26)]
+
+# and the inverse tables, to encrypt plaintext back into a room name for each shift
+encrypt_tables = [str.maketrans(alphabet[shift:] + alphabet[:shift] + ' ', alphabet + '-') for shift in range(26)]
 
 
 def decrypt_room_name(name, sector_num):
@@ -72,23 +127,25 @@ def decrypt_room_name(name, sector_num):
     :param sector_num: the sector number the room is in, as an integer
     :return: string containing the decrypted room name
     """
-    alphabet = list('abcdefghijklmnopqrstuvwxyz')
-    blank = '-'
+    return name.translate(decrypt_tables[sector_num % 26])
 
-    decrypted=[]
-    for c in name:
-        # if this is a character to blank, do so
-        if c in blank:
-            decrypted.append(' ')
-            continue
 
-        # otherwise, this MUST be an alphabet character, so rotate it
-        index = alphabet.index(c)
-        decrypted_c = alphabet[(index+sector_num) % len(alphabet)]
+def rooms_mentioning(rooms, plaintext):
+    """
+    Find the rooms whose decrypted names contain some plaintext.
+
+    Rather than decrypting every name, the plaintext is encrypted once for each of the 26 shifts, and each room name
+    is searched for the encryption matching its sector. Only the rooms that match are decrypted.
+
+    :param rooms: list of (name, sector) tuples, where sector is the sector id as a string
+    :param plaintext: string to search for (lowercase letters and spaces)
+    :return: a list of tuples (decrypted name, sector) for the rooms mentioning the plaintext, in order
+    """
+    encrypted = [plaintext.translate(table) for table in encrypt_tables]
 
-        decrypted.append(decrypted_c)
+    return [ (decrypt_room_name(name, int(sector)), sector) for name, sector in rooms
+             if encrypted[int(sector) % 26] in name ]
 
-    return "".join(decrypted)
 
 def day4b_solver(room_ids):
     """
@@ -97,19 +154,105 @@ def day4b_solver(room_ids):
     :param room_ids: list of room ids
     :return: a list of tuples (name, sector) for rooms which are valid and mention 'north' in their name
     """
-    # parse all the room id's into their parts
-    room_tuples = [parse_room_id(room_id) for room_id in room_ids]
+    # check for the names of rooms with valid checksums that mention 'north'
+    north_pole_names = rooms_mentioning([(room.name, room.sector) for room in valid_rooms(room_ids)], 'north')
 
-    # filter by those whose expected checksums match the computed ones
-    valid_tuples = [(n, s, ec) for n, s, ec in room_tuples if ec == compute_checksum(n)]
+    return north_pole_names
 
-    # get all the decrypted names and sector ids
-    decrypted = [ (decrypt_room_name(n,int(s)),s) for n,s,ec in valid_tuples ]
 
-    # check for names that mention 'north'
-    north_pole_names = [(n,s) for n,s in decrypted if 'north' in n]
+def day4_solver(room_ids):
+    """
+    Solve both parts, parsing and checksumming each room id once and handing the valid rooms to both.
+
+    :param room_ids: list of room id strings
+    :return: a tuple of (day4a_solver result, day4b_solver result)
+    """
+    rooms = valid_rooms(room_ids)
+
+    sum_sector_ids = sum([int(room.sector) for room in rooms])
+    north_pole_names = rooms_mentioning([(room.name, room.sector) for room in rooms], 'north')
+
+    return sum_sector_ids, north_pole_names
+
+
+def compute_letter_checksums(names):
+    """
+    Compute the room checksums of many room names at once (see compute_letter_checksum), using one numpy
+    bincount over all of the names to build an n x 26 table of letter counts.
+
+    :param names: list of room names made up of lowercase letters and '-'
+    :return: an n x 6 uint8 ndarray of checksum letters, padded with zeros after the (up to 5) letters
+    """
+    buf = np.frombuffer('\n'.join(names).encode('ascii'), dtype=np.uint8)
+    line = np.cumsum(buf == ord('\n'))
+    isletter = (buf >= ord('a')) & (buf <= ord('z'))
+    counts = np.bincount(line[isletter] * 26 + (buf[isletter] - ord('a')), minlength=len(names) * 26)
+    counts = counts.reshape(len(names), 26)
+
+    # a stable sort on descending counts keeps letters with equal counts in alphabetical order
+    letters = np.argsort(-counts, axis=1, kind='stable')[:, 0:5]
+    top = np.take_along_axis(counts, letters, axis=1)
+
+    checksums = np.zeros((len(names), 6), dtype=np.uint8)
+    checksums[:, 0:5] = np.where(top > 0, letters + ord('a'), 0)
+    return checksums
+
+
+def day4_chunk_solver(room_ids):
+    """
+    Solve both parts for a chunk of room ids, parsing them all with one regex pass and checking all the checksums
+    with compute_letter_checksums().
+
+    :param room_ids: list of room id strings
+    :return: a tuple of (sum of the valid sector ids, list of (name, sector) north pole rooms)
+    """
+    rooms = room_id_lines_re.findall('\n'.join(room_ids))
+    if not rooms:
+        return 0, []
+    names, sectors, checksums = zip(*rooms)
+
+    # checksums longer than 5 letters keep a non-zero 6th byte, so never match
+    expected = np.frombuffer(np.array(checksums, dtype='S6').tobytes(), dtype=np.uint8).reshape(-1, 6)
+    valid = np.flatnonzero((compute_letter_checksums(names) == expected).all(axis=1))
+
+    sum_sector_ids = int(np.array(sectors)[valid].astype(np.int64).sum())
+    north_pole_names = rooms_mentioning([(names[i], sectors[i]) for i in valid], 'north')
+
+    return sum_sector_ids, north_pole_names
+
+
+def iter_room_id_chunks(filename, chunklines):
+    """
+    :return: a generator of lists of up to chunklines room ids from the file
+    """
+    with open(filename, 'r') as infile:
+        lines = (line.rstrip('\n') for line in infile)
+        while True:
+            chunk = list(itertools.islice(lines, chunklines))
+            if not chunk:
+                return
+            yield chunk
+
+
+def day4_parallel_solver(filename, processes=None, chunklines=100000):
+    """
+    Solve both parts for a (very large) file of room ids, streaming it to a process pool a chunk of lines at a time.
+
+    :param filename: file with one room id per line
+    :param processes: number of worker processes (defaults to the number of cores)
+    :param chunklines: number of room ids handed to a worker at a time
+    :return: a tuple of (day4a_solver result, day4b_solver result)
+    """
+    sum_sector_ids = 0
+    north_pole_names = []
+
+    with multiprocessing.Pool(processes=processes) as pool:
+        for chunk_sum, chunk_names in pool.imap(day4_chunk_solver, iter_room_id_chunks(filename, chunklines)):
+            sum_sector_ids += chunk_sum
+            north_pole_names.extend(chunk_names)
+
+    return sum_sector_ids, north_pole_names
 
-    return north_pole_names
 
 if __name__ == '__main__':
     with(open('input_4a.txt', 'r')) as infile:
@@ -117,3 +260,5 @@ if __name__ == '__main__':
 
     print(day4a_solver(room_id_list))
     print(day4b_solver(room_id_list))
+    print(day4_solver(room_id_list))
+    print(day4_parallel_solver('input_4a.txt'))
@@ -1,6 +1,11 @@
 import unittest
+import os
+import random
+import tempfile
 
-from day4 import parse_room_id, compute_checksum, day4a_solver, decrypt_room_name
+from day4 import parse_room_id, compute_checksum, day4a_solver, day4b_solver, decrypt_room_name
+from day4 import compute_letter_checksum, compute_letter_checksums, day4_solver, day4_parallel_solver
+from day4 import rooms_mentioning
 
 class Day4Tests(unittest.TestCase):
 
@@ -44,5 +49,56 @@ class Day4Tests(unittest.TestCase):
         decrypted = decrypt_room_name('qzmt-zixmtkozy-ivhz', 343)
         self.assertEqual(decrypted, 'very encrypted name')
 
+    def test_rooms_mentioning(self):
+        rooms = [('qzmt-zixmtkozy-ivhz', '343'), ('qzmt-zixmtkozy-ivhz', '344'), ('abc', '0'), ('ab-c', '26')]
+        self.assertEqual(rooms_mentioning(rooms, 'encrypted'), [('very encrypted name', '343')])
+        self.assertEqual(rooms_mentioning(rooms, 'y e'), [('very encrypted name', '343')])
+        self.assertEqual(rooms_mentioning(rooms, 'b c'), [('ab c', '26')])
+        self.assertEqual(rooms_mentioning(rooms, 'north'), [])
+
+    def test_compute_letter_checksum(self):
+        self.assertEqual(compute_letter_checksum('aaaaa-bbb-z-y-x'), 'abxyz')
+        self.assertEqual(compute_letter_checksum('a-b-c-d-e-f-g-h'), 'abcde')
+        self.assertEqual(compute_letter_checksum('not-a-real-room'), 'oarel')
+        self.assertEqual(compute_letter_checksum('ab-ba'), 'ab')
+
+        rng = random.Random(6)
+        for _ in range(1000):
+            name = '-'.join(''.join(rng.choice('abcdefghij') for _ in range(rng.randint(1, 8)))
+                            for _ in range(rng.randint(1, 4)))
+            self.assertEqual(compute_letter_checksum(name), compute_checksum(name))
+
+    def test_compute_letter_checksums(self):
+        names = ['aaaaa-bbb-z-y-x', 'a-b-c-d-e-f-g-h', 'not-a-real-room', 'ab-ba', 'totally-real-room']
+        checksums = [bytes(c).rstrip(b'\0').decode('ascii') for c in compute_letter_checksums(names)]
+        self.assertEqual(checksums, [compute_checksum(name) for name in names])
+
+    def test_day4_solver(self):
+        room_ids = ['aaaaa-bbb-z-y-x-123[abxyz]', 'qzmt-zixmtkozy-ivhz-343[zimth]', 'not a room',
+                    'northpole-object-storage-{}[{}]'.format(26 * 20, compute_checksum('northpole-object-storage'))]
+        self.assertEqual(day4_solver(room_ids), (day4a_solver(room_ids), day4b_solver(room_ids)))
+
+    def test_parallel_solver(self):
+        rng = random.Random(7)
+        room_ids = ['aaaaa-bbb-z-y-x-123[abxyz]', 'a-b-c-d-e-f-g-h-987[abcde]',
+                    'not-a-real-room-404[oarel]', 'totally-real-room-200[decoy]',
+                    'not-a-real-room-404[oarelx]', 'ab-ba-10[ab]', 'not a room']
+        for _ in range(500):
+            name = '-'.join(''.join(rng.choice('abcdefgh') for _ in range(rng.randint(1, 6))) for _ in range(3))
+            checksum = compute_checksum(name) if rng.random() < 0.5 else 'abcde'
+            room_ids.append('{}-{}[{}]'.format(name, rng.randint(100, 999), checksum))
+        # and one that decrypts to mention the north pole
+        room_ids.append('northpole-object-storage-{}[{}]'.format(26 * 20, compute_checksum('northpole-object-storage')))
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as outfile:
+            outfile.write('\n'.join(room_ids) + '\n')
+        try:
+            result = day4_parallel_solver(outfile.name, processes=2, chunklines=37)
+        finally:
+            os.remove(outfile.name)
+
+        self.assertEqual(result, (day4a_solver(room_ids), day4b_solver(room_ids)))
+        self.assertEqual(result[1], [('northpole object storage', '520')])
+
 if __name__ == '__main__':
     unittest.main()
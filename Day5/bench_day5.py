@@ -0,0 +1,42 @@
+import hashlib
+import os
+import sys
+import timeit
+
+from day5 import find_hashes_in_block, iter_hashes
+
+# report md5 hashes per second per core, for the original hex-string check, the pre-seeded digest check, and the
+# process pool search
+# usage: python bench_day5.py [processes]
+
+
+def find_hashes_hexdigest(room_id, start, stop):
+    # the original approach: hash the whole string for every index and check the hex digest
+    hits = []
+    for index in range(start, stop):
+        hsh = hashlib.md5((room_id + str(index)).encode('ascii')).hexdigest()
+        if hsh.startswith('00000'):
+            hits.append((index, hsh))
+    return hits
+
+
+def first_hashes(room_id, processes, nhits):
+    hashes = iter_hashes(room_id, processes)
+    result = [next(hashes) for _ in range(nhits)]
+    hashes.close()
+    return result
+
+
+if __name__ == '__main__':
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    nindices = 2000000
+
+    for search in (find_hashes_hexdigest, find_hashes_in_block):
+        assert search('abc', 3000000, 3300000) == find_hashes_in_block('abc', 3000000, 3300000)
+        t = timeit.timeit(lambda: search('abc', 0, nindices), number=1)
+        print('{}: {:.2f}M hashes/s on 1 core'.format(search.__name__, nindices / t / 1e6))
+
+    # the first 3 hits for 'abc' need 5278569 hashes
+    t = timeit.timeit(lambda: first_hashes('abc', processes, 3), number=1)
+    print('iter_hashes with {} processes: {:.2f}M hashes/s, {:.2f}M hashes/s per core'.format(
+        processes, 5278569 / t / 1e6, 5278569 / t / 1e6 / processes))
@@ -1,26 +1,222 @@
+import collections
 import hashlib
+import multiprocessing
+import os
+import struct
 
 
-def day5a_solver(room_id, checkpoint_test = None, password_update=lambda pwd,hsh: pwd + hsh[5]):
-    index = 0
-    password = ''
+def find_hashes_in_block(room_id, start, stop, zeros = 5):
+    """
+    Search a block of indices for hashes of room_id + str(index) starting with five zeros (in hex).
+
+    The room id is only hashed once: each index copies the pre-seeded md5 object, and the check is made on the raw
+    digest bytes (comparing them with the smallest digest that has too few leading zeros) rather than on the hex
+    string.
+
+    :param room_id: the room id (door id) to hash
+    :param start: first index to hash
+    :param stop: index to stop before
+    :param zeros: the number of leading zero hex characters to look for (fewer make for quick tests)
+    :return: a list of (index, hexdigest) tuples for the matching hashes, in index order
+    """
+    seeded = hashlib.md5(room_id.encode('ascii'))
+    bound = (16 ** (32 - zeros)).to_bytes(17, 'big')[1:] if zeros > 0 else b'\xff' * 17
+    hits = []
+
+    for index in range(start, stop):
+        hsh = seeded.copy()
+        hsh.update(str(index).encode('ascii'))
+        if hsh.digest() < bound:
+            hits.append((index, hsh.hexdigest()))
+
+    return hits
+
+
+def iter_hash_blocks(room_id, processes = None, blocksize = 100000, start = 0, zeros = 5):
+    """
+    Search the indices from start onwards for matching hashes (see find_hashes_in_block), a block at a time, for ever.
+
+    The index space is split into contiguous blocks, which are farmed out to a process pool a few at a time and
+    collected back in order. With a single process the blocks are searched in this process instead.
+
+    :param room_id: the room id (door id) to hash
+    :param processes: number of worker processes (defaults to the number of cores)
+    :param blocksize: number of indices in each block
+    :param start: index to start searching from
+    :param zeros: the number of leading zero hex characters to look for
+    :return: a generator of (blockstop, hits) tuples in index order, where hits is the list of (index, hexdigest)
+             tuples found before blockstop
+    """
+    processes = processes or os.cpu_count()
+    blockstarts = iter(range(start, 1 << 63, blocksize))
+
+    if processes == 1:
+        for blockstart in blockstarts:
+            yield blockstart + blocksize, find_hashes_in_block(room_id, blockstart, blockstart + blocksize, zeros)
+        return
+
+    # keep a couple of blocks queued for each worker, so they never wait on us between blocks
+    with multiprocessing.Pool(processes=processes) as pool:
+        pending = collections.deque()
+        for blockstart in blockstarts:
+            blockstop = blockstart + blocksize
+            pending.append((blockstop, pool.apply_async(find_hashes_in_block, (room_id, blockstart, blockstop, zeros))))
+            if len(pending) >= 2 * processes:
+                blockstop, hits = pending.popleft()
+                yield blockstop, hits.get()
+
+
+def iter_hashes(room_id, processes = None, blocksize = 100000, start = 0, zeros = 5):
+    """
+    Generate the matching hashes for room_id (see find_hashes_in_block) in index order, for ever.
+
+    :param room_id: the room id (door id) to hash
+    :param processes: number of worker processes (defaults to the number of cores)
+    :param blocksize: number of indices searched at a time by each worker
+    :param start: index to start searching from
+    :param zeros: the number of leading zero hex characters to look for
+    :return: a generator of (index, hexdigest) tuples
+    """
+    for blockstop, hits in iter_hash_blocks(room_id, processes, blocksize, start, zeros):
+        yield from hits
+
+
+# on-disk index of the matching hashes, so searches can be resumed and shared between the password variants
+#
+# the file starts with the magic bytes, then the length of the room id, the number of leading zeros searched for and
+# the room id itself. After that it holds a record for each block searched in order from index 0: the index the
+# block stops before and the number of hits, followed by each hit's index and its full 16 byte digest.
+hash_index_magic = b'AoC2016-5v2'
+hash_index_header = struct.Struct('<HB')
+hash_index_block = struct.Struct('<QI')
+hash_index_hit = struct.Struct('<Q16s')
+
+
+def hash_index_file_header(room_id, zeros):
+    encoded = room_id.encode('ascii')
+    return hash_index_magic + hash_index_header.pack(len(encoded), zeros) + encoded
+
+
+def read_hash_index(filename, room_id, zeros = 5):
+    """
+    Read a hash index file, ignoring any partly written block at the end (e.g. from a killed run).
 
-    while(len(password)<8 or '_' in password):
-        tohash = (room_id + str(index))
-        hsh = hashlib.md5(tohash.encode('ascii')).hexdigest()
+    :param filename: the index file
+    :param room_id: the room id (door id) the index should be for
+    :param zeros: the number of leading zero hex characters the index should be for
+    :return: a tuple of (searched, hits, length) where searched is the index the search has reached, hits is a list
+             of (index, hexdigest) tuples of the matching hashes, and length is the length of the file up to the end
+             of the last complete block (or None if there is no index file)
+    """
+    if not os.path.exists(filename):
+        return 0, [], None
 
-        if hsh.startswith('00000'):
-            password = password_update(password,hsh)
+    with open(filename, 'rb') as infile:
+        data = infile.read()
+
+    header = hash_index_file_header(room_id, zeros)
+    if not data.startswith(header):
+        raise ValueError('{} is not a hash index for {} with {} zeros'.format(filename, room_id, zeros))
+
+    searched = 0
+    hits = []
+    pos = length = len(header)
+    while pos + hash_index_block.size <= len(data):
+        blockstop, nhits = hash_index_block.unpack_from(data, pos)
+        pos += hash_index_block.size
+        if pos + nhits * hash_index_hit.size > len(data):
+            break
+
+        for index, digest in hash_index_hit.iter_unpack(data[pos:pos + nhits * hash_index_hit.size]):
+            hits.append((index, digest.hex()))
+        pos += nhits * hash_index_hit.size
+        searched, length = blockstop, pos
+
+    return searched, hits, length
+
+
+def iter_indexed_hashes(room_id, filename, processes = None, blocksize = 100000, zeros = 5):
+    """
+    Generate the matching hashes for room_id in index order, for ever, answering from the hash index file as far as
+    it goes, then searching on from there and appending each searched block to the index.
+
+    :param room_id: the room id (door id) to hash
+    :param filename: the hash index file, which is created if it doesn't exist
+    :param processes: number of worker processes (defaults to the number of cores)
+    :param blocksize: number of indices searched at a time by each worker
+    :param zeros: the number of leading zero hex characters to look for
+    :return: a generator of (index, hexdigest) tuples
+    """
+    searched, hits, length = read_hash_index(filename, room_id, zeros)
+    yield from hits
+
+    with open(filename, 'wb' if length is None else 'r+b') as indexfile:
+        if length is None:
+            indexfile.write(hash_index_file_header(room_id, zeros))
+        else:
+            indexfile.truncate(length)
+            indexfile.seek(length)
+
+        for blockstop, hits in iter_hash_blocks(room_id, processes, blocksize, searched, zeros):
+            indexfile.write(hash_index_block.pack(blockstop, len(hits)))
+            for index, hsh in hits:
+                indexfile.write(hash_index_hit.pack(index, bytes.fromhex(hsh)))
+            indexfile.flush()
+
+            yield from hits
+
+
+def password_from_hashes(room_id, hashes, checkpoint_test = None, password_update=lambda pwd,hsh: pwd + hsh[5]):
+    """
+    Build a password from a sequence of matching hashes.
+
+    :param room_id: the room id (door id) that was hashed
+    :param hashes: iterable of (index, hexdigest) tuples of hashes starting with five zeros, in index order
+    :param checkpoint_test: optional callable(index, tohash, hsh, password), called after each matching hash
+    :param password_update: callable(pwd, hsh) giving the updated password after a matching hash
+    :return: the password
+    """
+    password = ''
+
+    for index, hsh in hashes:
+        password = password_update(password, hsh)
 
         if checkpoint_test:
-            checkpoint_test(index, tohash, hsh, password)
+            checkpoint_test(index, room_id + str(index), hsh, password)
 
-        index += 1
+        if len(password) >= 8 and '_' not in password:
+            break
 
     return password
 
 
-def day5b_solver(room_id, checkpoint_test = None):
+def day5a_solver(room_id, checkpoint_test = None, password_update=lambda pwd,hsh: pwd + hsh[5], processes = None,
+                 indexfile = None):
+    """
+    Find the password for a door, using a process pool to search for the hashes (see iter_hashes).
+
+    If an index file is given, the hashes found by earlier runs (including runs for the other password variant) are
+    answered from it, and any new searching resumes from where they stopped (see iter_indexed_hashes).
+
+    :param room_id: the door id
+    :param checkpoint_test: optional callable(index, tohash, hsh, password), called for each hash starting with five zeros
+    :param password_update: callable(pwd, hsh) giving the updated password after a hash starting with five zeros
+    :param processes: number of worker processes (defaults to the number of cores)
+    :param indexfile: optional hash index file to answer from, resume from and extend
+    :return: the password
+    """
+    if indexfile:
+        hashes = iter_indexed_hashes(room_id, indexfile, processes)
+    else:
+        hashes = iter_hashes(room_id, processes)
+
+    try:
+        return password_from_hashes(room_id, hashes, checkpoint_test, password_update)
+    finally:
+        hashes.close()
+
+
+def day5b_solver(room_id, checkpoint_test = None, processes = None, indexfile = None):
     def positional_password_updater(pwd,hsh):
         if pwd=='':
             pwd='________'
@@ -29,10 +225,11 @@ def day5b_solver(room_id, checkpoint_test = None):
             pwd = pwd[0:pos] + hsh[6] + pwd[pos+1:8]
         return pwd
 
-    return day5a_solver(room_id, checkpoint_test, password_update=positional_password_updater)
+    return day5a_solver(room_id, checkpoint_test, password_update=positional_password_updater, processes=processes,
+                        indexfile=indexfile)
 
 
 
 if __name__ == '__main__':
-    print(day5a_solver('uqwqemis'))
-    print(day5b_solver('uqwqemis'))
+    print(day5a_solver('uqwqemis', indexfile='hashes_uqwqemis.idx'))
+    print(day5b_solver('uqwqemis', indexfile='hashes_uqwqemis.idx'))
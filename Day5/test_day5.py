@@ -1,6 +1,9 @@
 import unittest
+import os
+import tempfile
 
-from day5 import day5a_solver, day5b_solver
+from day5 import day5a_solver, day5b_solver, find_hashes_in_block, iter_hashes, iter_indexed_hashes, read_hash_index
+from day5 import password_from_hashes
 
 class Day5TestCase(unittest.TestCase):
     def test_day5a_solver(self):
@@ -87,6 +90,67 @@ class Day5TestCase(unittest.TestCase):
         self.assertEqual(password,'05ace8e3')
 
 
+    def test_find_hashes_in_block(self):
+        # The first index which produces a hash that starts with five zeroes is 3231929, which we find by hashing
+        # abc3231929; the sixth character of the hash, and thus the first character of the password, is 1.
+        hits = find_hashes_in_block('abc', 3231900, 3232000)
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(hits[0][0], 3231929)
+        self.assertTrue(hits[0][1].startswith('000001'))
+
+    def test_iter_hashes_in_order(self):
+        # blocks finish out of order across the pool, but the hits come back in index order
+        for processes in (1, 2):
+            hashes = iter_hashes('abc', processes=processes, blocksize=50000, start=3200000)
+            self.assertEqual([next(hashes)[0] for _ in range(3)], [3231929, 5017308, 5278568])
+
+    def test_hash_index_resume(self):
+        # three leading zeros keep the search space small: the first hits for abc are at 2196, 3527 and 10201
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'abc.idx')
+            expected = find_hashes_in_block('abc', 0, 12000, zeros=3)
+            self.assertEqual([index for index, _ in expected], [2196, 3527, 10201])
+
+            # search up to the first hit, then stop
+            hashes = iter_indexed_hashes('abc', filename, processes=1, blocksize=3000, zeros=3)
+            self.assertEqual(next(hashes), expected[0])
+            hashes.close()
+
+            searched, hits, length = read_hash_index(filename, 'abc', zeros=3)
+            self.assertEqual(searched, 3000)
+            self.assertEqual(hits, expected[0:1])
+
+            # a partly written block at the end is ignored, and overwritten when the search resumes
+            with open(filename, 'ab') as indexfile:
+                indexfile.write(b'\x01\x02\x03')
+            self.assertEqual(read_hash_index(filename, 'abc', zeros=3), (searched, hits, length))
+
+            # hits answered from the index have their full digests
+            hashes = iter_indexed_hashes('abc', filename, processes=1, blocksize=3000, zeros=3)
+            self.assertEqual([next(hashes) for _ in range(3)], expected)
+            hashes.close()
+            self.assertEqual(read_hash_index(filename, 'abc', zeros=3)[0:2], (12000, expected))
+
+            with self.assertRaises(ValueError):
+                read_hash_index(filename, 'abd', zeros=3)
+            with self.assertRaises(ValueError):
+                read_hash_index(filename, 'abc')
+
+    def test_indexed_solver_callbacks(self):
+        # the callbacks see the same full digests whether the hashes are searched for or read from the index
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'abc.idx')
+            hashes = iter_indexed_hashes('abc', filename, processes=1, blocksize=20000, zeros=3)
+            searched = [next(hashes) for _ in range(8)]
+            hashes.close()
+
+            indexed = []
+            hashes = iter_indexed_hashes('abc', filename, processes=1, blocksize=20000, zeros=3)
+            password_from_hashes('abc', hashes, lambda index, tohash, hsh, password: indexed.append((index, hsh)))
+            hashes.close()
+            self.assertEqual(indexed, searched)
+            self.assertTrue(all(len(hsh) == 32 for _, hsh in indexed))
+
 
 if __name__ == '__main__':
     unittest.main()
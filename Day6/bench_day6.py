@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+from day6 import day6a_solver, file_solver, histogram_solver, select_least_common
+
+# time the streaming column-frequency engine on a large generated message file, and the Counter-based solver on the
+# first million lines of it
+# usage: python bench_day6.py [nlines]     (e.g. 100000000)
+
+
+def write_messages(filename, nlines, msglen=8, chunklines=1 << 20):
+    rng = np.random.default_rng(0)
+    with open(filename, 'wb') as outfile:
+        for start in range(0, nlines, chunklines):
+            chars = rng.integers(ord('a'), ord('z') + 1, size=(min(chunklines, nlines - start), msglen + 1), dtype=np.uint8)
+            chars[:, msglen] = ord('\n')
+            outfile.write(chars.tobytes())
+
+
+if __name__ == '__main__':
+    nlines = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 7
+
+    fd, filename = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        write_messages(filename, nlines)
+        for selector in (None, select_least_common):
+            args = (filename, selector) if selector else (filename,)
+            t = timeit.timeit(lambda: file_solver(*args), number=1)
+            print('file_solver({}): {} lines in {:.2f}s ({:.1f}M lines/s)'.format(
+                selector.__name__ if selector else '', nlines, t, nlines / t / 1e6))
+
+        with open(filename, 'r') as infile:
+            lines = [infile.readline().rstrip('\n') for _ in range(min(nlines, 10 ** 6))]
+        assert histogram_solver(lines) == day6a_solver(lines)
+        for solver in (day6a_solver, histogram_solver):
+            t = timeit.timeit(lambda: solver(lines), number=1)
+            print('{}: {} lines in {:.2f}s ({:.1f}M lines/s)'.format(solver.__name__, len(lines), t, len(lines) / t / 1e6))
+    finally:
+        os.remove(filename)
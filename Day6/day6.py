@@ -1,5 +1,8 @@
 import collections
+import io
+import multiprocessing
 import operator
+import numpy as np
 
 def day6a_solver(lines, character_selector=lambda ft: ft.most_common(1)[0][0]):
     # count the frequency of each character in every position of our input
@@ -24,9 +27,257 @@ def day6b_solver(lines):
 
     return day6a_solver(lines, character_selector=least_common)
 
+
+# vectorised column-frequency engine
+#
+# messages are held as 2-D uint8 arrays (one row per line), and each column's character frequencies as one row of
+# an (ncolumns, 256) count array, so that a whole chunk of lines is counted by a single bincount. To break ties the
+# same way as the Counter-based solvers (the character seen first wins), the row each character was first seen in
+# each column is kept alongside the counts.
+
+# firstseen value for characters that have not been seen in a column
+never_seen = np.iinfo(np.int64).max
+
+
+def lines_to_array(lines):
+    """
+    :param lines: list of equal-length strings
+    :return: an (nlines, msglen) uint8 ndarray of the characters
+    """
+    msglen = len(lines[0])
+
+    # every line is the same length exactly when every newline lands in the last column
+    chars = np.frombuffer(('\n'.join(lines) + '\n').encode('ascii'), dtype=np.uint8)
+    assert(len(chars) == len(lines) * (msglen + 1))
+    chars = chars.reshape(len(lines), msglen + 1)
+    assert(np.all(chars[:, msglen] == ord('\n')))
+
+    return chars[:, :msglen]
+
+
+def column_histogram(chars, firstrow=0):
+    """
+    Count the characters in each column of a block of lines.
+
+    :param chars: an (nlines, msglen) uint8 ndarray of the characters
+    :param firstrow: the row number of the first line in the block, for the firstseen rows
+    :return: a tuple of (counts, firstseen), both (msglen, 256) int64 ndarrays where counts[col, c] is the number of
+             times character c appears in column col, and firstseen[col, c] the row it first appears in (or never_seen)
+    """
+    nlines, msglen = chars.shape
+    keys = chars + (np.arange(msglen, dtype=np.int32) * 256)
+    counts = np.bincount(keys.ravel(), minlength=msglen * 256)
+
+    # find the first row of each character that appears, searching a doubling window of rows until all are found
+    firstseen = np.full(msglen * 256, never_seen, dtype=np.int64)
+    remaining = np.count_nonzero(counts)
+    start, window = 0, 256
+    while remaining:
+        block = keys[start:start + window].ravel()
+        found, index = np.unique(block, return_index=True)
+        new = firstseen[found] == never_seen
+        firstseen[found[new]] = firstrow + start + index[new] // msglen
+        remaining -= np.count_nonzero(new)
+        start, window = start + window, window * 2
+
+    return counts.reshape(msglen, 256), firstseen.reshape(msglen, 256)
+
+
+def select_most_common(counts, firstseen):
+    """
+    :return: the string of the most common character in each column, ties going to the character seen first
+    """
+    candidates = counts == counts.max(axis=1, keepdims=True)
+    return np.argmin(np.where(candidates, firstseen, never_seen), axis=1).astype(np.uint8).tobytes().decode('ascii')
+
+
+def select_least_common(counts, firstseen):
+    """
+    :return: the string of the least common character in each column, ties going to the character seen first
+    """
+    present = np.where(counts > 0, counts, never_seen)
+    candidates = present == present.min(axis=1, keepdims=True)
+    return np.argmin(np.where(candidates, firstseen, never_seen), axis=1).astype(np.uint8).tobytes().decode('ascii')
+
+
+def histogram_solver(lines, selector=select_most_common):
+    """
+    Decode a repetition code message, counting the columns with numpy (gives the same result as day6a_solver, or
+    day6b_solver if the selector is select_least_common).
+
+    :param lines: list of equal-length strings
+    :param selector: callable(counts, firstseen) choosing the character for each column
+    :return: the decoded message
+    """
+    return selector(*column_histogram(lines_to_array(lines)))
+
+
+def iter_message_chunks(filename, chunklines=1 << 20):
+    """
+    Read a file of equal-length lines a chunk of lines at a time.
+
+    :param filename: file with one message line per line
+    :param chunklines: number of lines in each chunk (the last chunk may be shorter)
+    :return: a generator of (nlines, msglen) uint8 ndarrays
+    """
+    with open(filename, 'rb') as infile:
+        msglen = len(infile.readline().rstrip(b'\n'))
+        infile.seek(0)
+
+        while True:
+            block = infile.read(chunklines * (msglen + 1))
+            if not block:
+                return
+
+            # allow for a missing newline at the end of the file
+            if len(block) % (msglen + 1) and not block.endswith(b'\n'):
+                block += b'\n'
+            assert(len(block) % (msglen + 1) == 0)
+
+            chars = np.frombuffer(block, dtype=np.uint8).reshape(-1, msglen + 1)
+            assert(np.all(chars[:, msglen] == ord('\n')))
+            yield chars[:, :msglen]
+
+
+class ColumnFrequencies(object):
+    """
+    Mergeable per-column character frequency state, which can be updated incrementally from a stream of lines and
+    queried for the decoded message at any time.
+
+    Lines don't need to be the same length: the state grows columns as longer lines arrive, and each column only
+    counts the lines that reach it. States built from consecutive shards of a message can be merged in
+    O(columns x 256), and serialised with tobytes()/frombytes() to be combined elsewhere.
+    """
+    def __init__(self, msglen=0):
+        self.counts = np.zeros((msglen, 256), dtype=np.int64)
+        self.firstseen = np.full((msglen, 256), never_seen, dtype=np.int64)
+        self.nlines = 0
+
+    def _grow(self, msglen):
+        if msglen > len(self.counts):
+            extra = msglen - len(self.counts)
+            self.counts = np.vstack((self.counts, np.zeros((extra, 256), dtype=np.int64)))
+            self.firstseen = np.vstack((self.firstseen, np.full((extra, 256), never_seen, dtype=np.int64)))
+
+    def update_chars(self, chars):
+        """
+        Count a block of lines following the lines already counted.
+
+        :param chars: an (nlines, msglen) uint8 ndarray of the characters, where NUL characters are padding
+        """
+        counts, firstseen = column_histogram(chars, self.nlines)
+        counts[:, 0] = 0
+        firstseen[:, 0] = never_seen
+
+        self._grow(len(counts))
+        self.counts[:len(counts)] += counts
+        self.firstseen[:len(counts)] = np.minimum(self.firstseen[:len(counts)], firstseen)
+        self.nlines += len(chars)
+
+    def update(self, lines, chunklines=1 << 16):
+        """
+        Count lines following the lines already counted.
+
+        :param lines: iterable of strings (which may be of different lengths)
+        :param chunklines: number of lines to count at a time
+        """
+        lines = iter(lines)
+        while True:
+            chunk = [line.encode('ascii') for _, line in zip(range(chunklines), lines)]
+            if not chunk:
+                return
+
+            msglen = max(len(line) for line in chunk)
+            self.update_chars(np.frombuffer(b''.join([line.ljust(msglen, b'\0') for line in chunk]),
+                                            dtype=np.uint8).reshape(len(chunk), msglen))
+
+    def merge(self, other):
+        """
+        :param other: the ColumnFrequencies of the lines following the lines counted by this one
+        :return: a new ColumnFrequencies counting the lines of both
+        """
+        merged = ColumnFrequencies(max(len(self.counts), len(other.counts)))
+        for state, offset in ((self, 0), (other, self.nlines)):
+            msglen = len(state.counts)
+            merged.counts[:msglen] += state.counts
+            shifted = np.where(state.firstseen == never_seen, never_seen, state.firstseen + offset)
+            merged.firstseen[:msglen] = np.minimum(merged.firstseen[:msglen], shifted)
+        merged.nlines = self.nlines + other.nlines
+
+        return merged
+
+    def most_common(self):
+        return select_most_common(self.counts, self.firstseen)
+
+    def least_common(self):
+        return select_least_common(self.counts, self.firstseen)
+
+    def tobytes(self):
+        outfile = io.BytesIO()
+        np.savez(outfile, counts=self.counts, firstseen=self.firstseen, nlines=self.nlines)
+        return outfile.getvalue()
+
+    @staticmethod
+    def frombytes(data):
+        arrays = np.load(io.BytesIO(data))
+        state = ColumnFrequencies()
+        state.counts, state.firstseen, state.nlines = arrays['counts'], arrays['firstseen'], int(arrays['nlines'])
+        return state
+
+    @staticmethod
+    def from_file(filename, chunklines=1 << 20):
+        """
+        :return: the ColumnFrequencies of a file of equal-length lines, streamed a chunk of lines at a time
+        """
+        state = ColumnFrequencies()
+        for chars in iter_message_chunks(filename, chunklines):
+            state.update_chars(chars)
+        return state
+
+
+def file_solver(filename, selector=select_most_common, chunklines=1 << 20):
+    """
+    Decode a repetition code message from a file, streaming it a chunk of lines at a time so that only memory
+    proportional to the chunk size is needed.
+
+    :param filename: file with one message line per line
+    :param selector: callable(counts, firstseen) choosing the character for each column
+    :param chunklines: number of lines to count at a time
+    :return: the decoded message
+    """
+    state = ColumnFrequencies.from_file(filename, chunklines)
+    return selector(state.counts, state.firstseen)
+
+
+def shard_solver(filenames, selector=select_most_common, processes=None):
+    """
+    Decode a repetition code message split across several files, counting the shards in a process pool and
+    merging their states in order.
+
+    :param filenames: list of shard files, in message order
+    :param selector: callable(counts, firstseen) choosing the character for each column
+    :param processes: number of worker processes (defaults to the number of cores)
+    :return: the decoded message
+    :raises ValueError: if there are no shard files
+    """
+    if not filenames:
+        raise ValueError('shard_solver needs at least one shard file')
+
+    with multiprocessing.Pool(processes=processes) as pool:
+        states = pool.map(ColumnFrequencies.from_file, filenames)
+
+    state = states[0]
+    for shard in states[1:]:
+        state = state.merge(shard)
+
+    return selector(state.counts, state.firstseen)
+
+
 if __name__ == '__main__':
     with(open('input_6a.txt', 'r')) as infile:
         msglines = infile.read().splitlines()
 
     print(day6a_solver(msglines))
     print(day6b_solver(msglines))
+    print(file_solver('input_6a.txt'))
+    print(file_solver('input_6a.txt', select_least_common))
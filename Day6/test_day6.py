@@ -1,6 +1,10 @@
 import unittest
+import os
+import random
+import tempfile
 
-from day6 import day6a_solver
+from day6 import day6a_solver, day6b_solver, histogram_solver, file_solver, select_least_common
+from day6 import ColumnFrequencies, shard_solver
 
 class Day6Tests(unittest.TestCase):
     def test_decode_example1(self):
@@ -24,6 +28,76 @@ class Day6Tests(unittest.TestCase):
         decoded = day6a_solver(example)
         self.assertEqual(decoded,'easter')
 
+        self.assertEqual(histogram_solver(example), 'easter')
+        # In the above example, the least common character in the first column is a; ... the original message is advent.
+        self.assertEqual(histogram_solver(example, select_least_common), 'advent')
+
+    def test_histogram_solver_matches_counters(self):
+        # small alphabets and few lines give plenty of ties, which must go to the character seen first
+        rng = random.Random(8)
+        for nlines in (1, 2, 3, 10, 300, 1000):
+            lines = [''.join(rng.choice('abcd') for _ in range(6)) for _ in range(nlines)]
+            self.assertEqual(histogram_solver(lines), day6a_solver(lines))
+            self.assertEqual(histogram_solver(lines, select_least_common), day6b_solver(lines))
+
+    def test_file_solver_chunks(self):
+        rng = random.Random(9)
+        lines = [''.join(rng.choice('abcdef') for _ in range(5)) for _ in range(1001)]
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as outfile:
+            outfile.write('\n'.join(lines))
+        try:
+            for chunklines in (1, 7, 1000, 5000):
+                self.assertEqual(file_solver(outfile.name, chunklines=chunklines), day6a_solver(lines))
+                self.assertEqual(file_solver(outfile.name, select_least_common, chunklines), day6b_solver(lines))
+        finally:
+            os.remove(outfile.name)
+
+    def test_incremental_and_merged_states(self):
+        rng = random.Random(10)
+        lines = [''.join(rng.choice('xyz') for _ in range(4)) for _ in range(500)]
+
+        incremental = ColumnFrequencies()
+        for start in range(0, len(lines), 37):
+            incremental.update(lines[start:start + 37])
+            self.assertEqual(incremental.most_common(), day6a_solver(lines[:start + 37]))
+            self.assertEqual(incremental.least_common(), day6b_solver(lines[:start + 37]))
+
+        # shards merged in order give the same answer, even after a round trip through bytes
+        shards = []
+        for start in range(0, len(lines), 100):
+            shard = ColumnFrequencies()
+            shard.update(lines[start:start + 100])
+            shards.append(ColumnFrequencies.frombytes(shard.tobytes()))
+
+        merged = shards[0]
+        for shard in shards[1:]:
+            merged = merged.merge(shard)
+        self.assertEqual(merged.nlines, len(lines))
+        self.assertEqual((merged.most_common(), merged.least_common()), (day6a_solver(lines), day6b_solver(lines)))
+
+    def test_variable_length_lines(self):
+        state = ColumnFrequencies()
+        state.update(['ab', 'abc', 'b', 'bbcd', 'a'])
+        self.assertEqual(state.most_common(), 'abcd')
+        self.assertEqual(state.least_common(), 'bbcd')
+
+    def test_shard_solver(self):
+        rng = random.Random(11)
+        lines = [''.join(rng.choice('abc') for _ in range(3)) for _ in range(300)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filenames = []
+            for start in range(0, len(lines), 70):
+                filenames.append(os.path.join(tmpdir, 'shard{}.txt'.format(start)))
+                with open(filenames[-1], 'w') as outfile:
+                    outfile.write('\n'.join(lines[start:start + 70]) + '\n')
+
+            self.assertEqual(shard_solver(filenames, processes=2), day6a_solver(lines))
+            self.assertEqual(shard_solver(filenames, select_least_common, processes=2), day6b_solver(lines))
+
+        self.assertRaises(ValueError, shard_solver, [])
+
 
 if __name__ == '__main__':
     unittest.main()
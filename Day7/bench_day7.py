@@ -0,0 +1,39 @@
+import random
+import sys
+import timeit
+
+from day7 import count_tls_capable_addresses, count_ssl_capable_addresses, count_tls_and_ssl_capable_addresses
+
+# compare the single-pass TLS/SSL scanner against running the two separate counters, on generated addresses shaped
+# like the puzzle input
+# usage: python bench_day7.py [naddresses]
+
+
+def generate_addresses(naddresses):
+    rng = random.Random(0)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    addresses = []
+    for _ in range(naddresses):
+        parts = [''.join(rng.choices(letters, k=rng.randint(8, 20))) for _ in range(2 * rng.randint(1, 3) + 1)]
+        addresses.append(''.join(part + ('[' if i % 2 == 0 else ']') for i, part in enumerate(parts[:-1])) + parts[-1])
+    return addresses
+
+
+if __name__ == '__main__':
+    naddresses = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    addresses = generate_addresses(naddresses)
+
+    separate = count_tls_capable_addresses(addresses), count_ssl_capable_addresses(addresses)
+    assert count_tls_and_ssl_capable_addresses(addresses) == separate
+
+    tseparate = timeit.timeit(lambda: (count_tls_capable_addresses(addresses), count_ssl_capable_addresses(addresses)), number=1)
+    tcombined = timeit.timeit(lambda: count_tls_and_ssl_capable_addresses(addresses), number=1)
+    print('{} addresses: separate counters {:.2f}s, single pass {:.2f}s ({:.1f}x)'.format(
+        naddresses, tseparate, tcombined, tseparate / tcombined))
+
+    batchsize = 100000
+    assert (count_tls_capable_addresses(addresses, batchsize), count_ssl_capable_addresses(addresses, batchsize)) == separate
+    tbatch = timeit.timeit(lambda: (count_tls_capable_addresses(addresses, batchsize),
+                                    count_ssl_capable_addresses(addresses, batchsize)), number=1)
+    print('{} addresses: numpy batches of {} {:.2f}s ({:.1f}x separate counters)'.format(
+        naddresses, batchsize, tbatch, tseparate / tbatch))
@@ -1,9 +1,13 @@
 import re
+import numpy as np
 
 
 # regular expression used to segment addresses into parts
 split_alpha_sequence_re = re.compile('\W')
 
+# the characters does_address_support_tls_and_ssl can handle
+address_chars_re = re.compile(r'[a-z\[\]]*')
+
 
 def search_for_abba_sequence(s):
     """
@@ -61,11 +65,16 @@ def does_address_support_tls(address):
     return valid_even_part
 
 
-def count_tls_capable_addresses(addresses):
+def count_tls_capable_addresses(addresses, batchsize=None):
     """
     :param addresses: list of strings containing addresses
+    :param batchsize: if given, check the addresses this many at a time with numpy (see batch_address_support)
     :return: integer count
     """
+    if batchsize:
+        return sum(int(np.count_nonzero(batch_address_support(addresses[i:i + batchsize])[0]))
+                   for i in range(0, len(addresses), batchsize))
+
     tls_capable_addresses = [addr for addr in addresses if does_address_support_tls(addr)]
     return len(tls_capable_addresses)
 
@@ -112,21 +121,151 @@ def does_address_support_ssl(address):
     return len(aba_set.intersection(bab_set)) != 0
 
 
-def count_ssl_capable_addresses(addresses):
+def count_ssl_capable_addresses(addresses, batchsize=None):
     """
     :param addresses: list of strings containing addresses
+    :param batchsize: if given, check the addresses this many at a time with numpy (see batch_address_support)
     :return: integer count
     """
+    if batchsize:
+        return sum(int(np.count_nonzero(batch_address_support(addresses[i:i + batchsize])[1]))
+                   for i in range(0, len(addresses), batchsize))
+
     ssl_capable_addresses = [addr for addr in addresses if does_address_support_ssl(addr)]
     return len(ssl_capable_addresses)
 
 
+def does_address_support_tls_and_ssl(address):
+    """
+    Determine if an address supports TLS and if it supports SSL, in a single pass over the address.
+
+    The scan tracks the bracket depth and the last three characters of the current part. 'aba' sequences outside
+    brackets and 'bab' sequences inside them are recorded as (a,b) bits of 26x26 bitmaps (held in python ints),
+    so the address supports SSL if the two bitmaps share a bit.
+
+    :param address: string containing the address (lowercase letters and brackets)
+    :return: a tuple of booleans (supports_tls, supports_ssl)
+    :raises ValueError: if the address holds characters other than lowercase letters and brackets
+    """
+    # the bitmaps only have room for the 26 lowercase letters
+    if not address_chars_re.fullmatch(address):
+        raise ValueError('address {!r} is not made of lowercase letters and brackets'.format(address))
+
+    depth = 0
+    abba_outside = abba_inside = False
+    aba = bab = 0
+    p3 = p2 = p1 = None     # the previous three characters in the current part, most recent last
+
+    for c in address:
+        if c == '[' or c == ']':
+            # sequences can't span the brackets, so start a new part
+            depth += 1 if c == '[' else -1
+            p3 = p2 = p1 = None
+            continue
+
+        if c == p2 and c != p1:
+            # c p1 c is an 'aba' sequence, which also might be the end of an 'abba' sequence
+            if depth:
+                bab |= 1 << ((ord(p1) - 97) * 26 + ord(c) - 97)
+            else:
+                aba |= 1 << ((ord(c) - 97) * 26 + ord(p1) - 97)
+        elif c == p3 and p1 == p2 and c != p1:
+            if depth:
+                abba_inside = True
+            else:
+                abba_outside = True
+
+        p3, p2, p1 = p2, p1, c
+
+    return abba_outside and not abba_inside, (aba & bab) != 0
+
+
+def count_tls_and_ssl_capable_addresses(addresses):
+    """
+    :param addresses: list of strings containing addresses
+    :return: a tuple of integer counts (tls, ssl)
+    """
+    tls = ssl = 0
+    for address in addresses:
+        supports_tls, supports_ssl = does_address_support_tls_and_ssl(address)
+        tls += supports_tls
+        ssl += supports_ssl
+
+    return tls, ssl
+
+
+def addresses_to_matrix(addresses):
+    """
+    Pack addresses into one padded character matrix, with a mask of which characters are inside brackets.
+
+    :param addresses: list of strings containing addresses
+    :return: a tuple of (chars, inside) where chars is an (naddresses, maxlen) uint8 ndarray of the characters,
+             padded with zeros, and inside is a boolean ndarray of the same shape
+    :raises ValueError: if an address holds characters other than lowercase letters and brackets
+    """
+    lengths = np.array([len(address) for address in addresses], dtype=np.int64)
+    maxlen = int(lengths.max(initial=0))
+    padded = ''.join([address.ljust(maxlen, '\0') for address in addresses]).encode('ascii', 'replace')
+    chars = np.frombuffer(padded, dtype=np.uint8).reshape(len(addresses), maxlen)
+
+    valid = ((chars >= ord('a')) & (chars <= ord('z'))) | (chars == ord('[')) | (chars == ord(']'))
+    valid |= np.arange(maxlen) >= lengths[:, np.newaxis]
+    bad = np.flatnonzero(~valid.all(axis=1))
+    if len(bad):
+        raise ValueError('address {!r} is not made of lowercase letters and brackets'.format(addresses[bad[0]]))
+
+    # the bracket depth is the running total of the bracket markers along each row
+    markers = (chars == ord('[')).astype(np.int8) - (chars == ord(']'))
+    inside = np.cumsum(markers, axis=1, dtype=np.int8) > 0
+
+    return chars, inside
+
+
+def batch_address_support(addresses):
+    """
+    Determine which of many addresses support TLS and SSL, using shifted-array comparisons over one padded matrix of
+    all the addresses (see addresses_to_matrix).
+
+    Brackets and padding are not letters, so any window of letters lies within one part of an address.
+
+    :param addresses: list of strings containing addresses (lowercase letters and brackets)
+    :return: a tuple of boolean ndarrays (supports_tls, supports_ssl)
+    :raises ValueError: if an address holds characters other than lowercase letters and brackets
+    """
+    chars, inside = addresses_to_matrix(addresses)
+    letter = chars >= ord('a')      # the characters are all letters, brackets or zero padding
+
+    # abba sequences, by their first character
+    a, b, c, d = chars[:, :-3], chars[:, 1:-2], chars[:, 2:-1], chars[:, 3:]
+    abba = (a == d) & (b == c) & (a != b) & letter[:, :-3] & letter[:, 1:-2]
+    abba_inside = abba & inside[:, :-3]
+    supports_tls = np.any(abba & ~abba_inside, axis=1) & ~np.any(abba_inside, axis=1)
+
+    # aba sequences outside brackets and bab sequences inside them, as (address, a, b) keys
+    a, b, c = chars[:, :-2], chars[:, 1:-1], chars[:, 2:]
+    rows, cols = np.nonzero((a == c) & (a != b) & letter[:, :-2] & letter[:, 1:-1])
+    outer = chars[rows, cols].astype(np.int64) - ord('a')
+    middle = chars[rows, cols + 1].astype(np.int64) - ord('a')
+    aba_inside = inside[rows, cols]
+    keys = rows * 676 + np.where(aba_inside, middle * 26 + outer, outer * 26 + middle)
+
+    # an address supports SSL if any of its outside aba keys match one of its inside bab keys
+    matched = np.intersect1d(keys[~aba_inside], keys[aba_inside])
+    supports_ssl = np.zeros(len(addresses), dtype=bool)
+    supports_ssl[matched // 676] = True
+
+    return supports_tls, supports_ssl
+
+
 if __name__ == '__main__':
     with(open('input_7a.txt', 'r')) as infile:
         addresses = infile.read().splitlines()
 
     print(count_tls_capable_addresses(addresses))
     print(count_ssl_capable_addresses(addresses))
+    print(count_tls_and_ssl_capable_addresses(addresses))
+    print(count_tls_capable_addresses(addresses, batchsize=100000))
+    print(count_ssl_capable_addresses(addresses, batchsize=100000))
 
 
 
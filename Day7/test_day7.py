@@ -1,6 +1,19 @@
 import unittest
+import random
 
-from day7 import does_address_support_tls, does_address_support_ssl
+from day7 import does_address_support_tls, does_address_support_ssl, does_address_support_tls_and_ssl
+from day7 import count_tls_capable_addresses, count_ssl_capable_addresses, count_tls_and_ssl_capable_addresses
+from day7 import batch_address_support
+
+
+def random_addresses(seed, naddresses, letters='abc'):
+    # short parts from a small alphabet give plenty of abba/aba/bab sequences, and overlaps between them
+    rng = random.Random(seed)
+    addresses = []
+    for _ in range(naddresses):
+        parts = [''.join(rng.choice(letters) for _ in range(rng.randint(0, 8))) for _ in range(2 * rng.randint(0, 3) + 1)]
+        addresses.append(''.join(part + ('[' if i % 2 == 0 else ']') for i, part in enumerate(parts[:-1])) + parts[-1])
+    return addresses
 
 class Day7TlsTests(unittest.TestCase):
 
@@ -65,5 +78,53 @@ class Day7SslTests(unittest.TestCase):
         self.assertEqual(result, True)
 
 
+class Day7SinglePassTests(unittest.TestCase):
+
+    examples = ['abba[mnop]qrst', 'abcd[bddb]xyyx', 'aaaa[qwer]tyui', 'ioxxoj[asdfgh]zxcvbn',
+                'kjghsdf[kghaf]asddssd[werkjr]ljuwht', 'kjghsdf[kghaf]aasdsd[werjjr]ljuwht', 'abba[abba]abba',
+                'aba[bab]xyz', 'xyx[xyx]xyx', 'aaa[kek]eke', 'zazbz[bzb]cdb']
+
+    def test_examples(self):
+        for address in self.examples:
+            self.assertEqual(does_address_support_tls_and_ssl(address),
+                             (does_address_support_tls(address), does_address_support_ssl(address)))
+
+    def test_matches_separate_checks_random(self):
+        addresses = random_addresses(12, 2000)
+        for address in addresses:
+            self.assertEqual(does_address_support_tls_and_ssl(address),
+                             (does_address_support_tls(address), does_address_support_ssl(address)))
+
+        self.assertEqual(count_tls_and_ssl_capable_addresses(addresses),
+                         (count_tls_capable_addresses(addresses), count_ssl_capable_addresses(addresses)))
+
+    def test_rejects_other_characters(self):
+        for address in ['aBa[bab]', 'a1a[1a1]', 'abba[mnop] ']:
+            self.assertRaises(ValueError, does_address_support_tls_and_ssl, address)
+
+
+class Day7BatchTests(unittest.TestCase):
+
+    def test_examples(self):
+        supports_tls, supports_ssl = batch_address_support(Day7SinglePassTests.examples)
+        self.assertEqual(list(supports_tls), [does_address_support_tls(a) for a in Day7SinglePassTests.examples])
+        self.assertEqual(list(supports_ssl), [does_address_support_ssl(a) for a in Day7SinglePassTests.examples])
+
+    def test_batch_counts_match_scalar(self):
+        addresses = random_addresses(13, 3000) + ['', 'ab', 'abba']
+        for batchsize in (1, 7, 1000, 10000):
+            self.assertEqual(count_tls_capable_addresses(addresses, batchsize), count_tls_capable_addresses(addresses))
+            self.assertEqual(count_ssl_capable_addresses(addresses, batchsize), count_ssl_capable_addresses(addresses))
+
+    def test_rejects_other_characters(self):
+        addresses = ['xyyx[ab]c', 'aba[bab]x', 'abba[mnop]qrst']
+        self.assertEqual(count_tls_capable_addresses(addresses, 2), count_tls_capable_addresses(addresses))
+        self.assertEqual(count_ssl_capable_addresses(addresses, 2), count_ssl_capable_addresses(addresses))
+
+        for bad in ['ABBA[mnop]qrst', 'x1221y[ab]c', 'ABA[BAB]x', 'a{{a[mnop]', 'caf\xe9']:
+            self.assertRaises(ValueError, batch_address_support, addresses + [bad])
+            self.assertRaises(ValueError, count_tls_capable_addresses, addresses + [bad], 2)
+
+
 if __name__ == '__main__':
     unittest.main()
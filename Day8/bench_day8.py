@@ -0,0 +1,93 @@
+import contextlib
+import io
+import random
+import sys
+import timeit
+
+import numpy as np
+
+from day8 import apply_draw_commands, compile_draw_commands, run_draw_program
+from day8 import compile_permutation_steps, replay_permutation_steps, BitPackedDisplay, render_state
+
+# compare the compiled command programs against applying the command objects, on long generated scripts for a
+# large display
+# usage: python bench_day8.py [ncommands]
+
+
+def generate_commands(ncommands, height, width):
+    rng = random.Random(0)
+    commands = []
+    for _ in range(ncommands):
+        kind = rng.random()
+        if kind < 0.1:
+            commands.append('rect {}x{}'.format(rng.randint(1, max(1, width // 10)), rng.randint(1, max(1, height // 10))))
+        elif kind < 0.55:
+            commands.append('rotate row y={} by {}'.format(rng.randint(0, min(20, height - 1)), rng.randint(1, width)))
+        else:
+            commands.append('rotate column x={} by {}'.format(rng.randint(0, min(20, width - 1)), rng.randint(1, height)))
+    return commands
+
+
+def print_state_per_character(state):
+    # the original renderer, writing one character at a time
+    for y in range(0, state.shape[0]):
+        sys.stdout.write('\r\n')
+        for x in range(0, state.shape[1]):
+            if x != 0 and (x % 5) == 0:
+                sys.stdout.write(' ')
+            sys.stdout.write('#' if state[y, x] else '.')
+
+
+def bench_backends(ncommands, height, width):
+    commands = generate_commands(ncommands, height, width)
+    program = compile_draw_commands(commands)
+
+    state = np.zeros((height, width), dtype=np.int32)
+    tarray = timeit.timeit(lambda: run_draw_program(state, program), number=1)
+    display = BitPackedDisplay(height, width)
+    tbits = timeit.timeit(lambda: display.run_program(program), number=1)
+    assert np.array_equal(display.to_array(), state)
+    print('{} commands on {}x{}: int32 run_draw_program {:.2f}s, BitPackedDisplay {:.2f}s ({:.1f}x)'.format(
+        ncommands, height, width, tarray, tbits, tarray / tbits))
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        tprint = timeit.timeit(lambda: print_state_per_character(state), number=1)
+    assert output.getvalue() == render_state(state)
+    trender = timeit.timeit(lambda: render_state(state), number=1)
+    print('rendering {}x{}: per character {:.3f}s, render_state {:.4f}s ({:.0f}x)'.format(
+        height, width, tprint, trender, tprint / trender))
+
+
+if __name__ == '__main__':
+    ncommands = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    height, width = 1000, 1000
+    commands = generate_commands(ncommands, height, width)
+
+    tcompile = timeit.timeit(lambda: compile_draw_commands(commands), number=1)
+    program = compile_draw_commands(commands)
+    state = np.zeros((height, width), dtype=np.int32)
+    trun = timeit.timeit(lambda: run_draw_program(state, program), number=1)
+    print('{} commands on {}x{}: compile {:.2f}s ({} ops after merging), run {:.2f}s'.format(
+        ncommands, height, width, tcompile, len(program), trun))
+
+    expected = np.zeros((height, width), dtype=np.int32)
+    tcommands = timeit.timeit(lambda: apply_draw_commands(expected, commands), number=1)
+    assert np.array_equal(state, expected)
+    print('apply_draw_commands: {:.2f}s ({:.1f}x)'.format(tcommands, tcommands / (tcompile + trun)))
+
+    # replay a script on many starting frames: compose each rotation run once, then one gather per run for all frames
+    nframes, height, width = 10 ** 4, 6, 50
+    commands = generate_commands(2000, height, width)
+    frames = np.random.default_rng(0).integers(0, 2, size=(nframes, height, width)).astype(np.int32)
+    program = compile_draw_commands(commands)
+
+    tsteps = timeit.timeit(lambda: compile_permutation_steps(program, (height, width)), number=1)
+    steps = compile_permutation_steps(program, (height, width))
+    treplay = timeit.timeit(lambda: replay_permutation_steps(frames, steps), number=1)
+    tloop = timeit.timeit(lambda: [run_draw_program(frame.copy(), program) for frame in frames[:1000]], number=1) * 10
+    print('{} commands ({} steps) on {} {}x{} frames: compose {:.3f}s, replay {:.2f}s, run_draw_program per frame {:.2f}s'.format(
+        len(commands), len(steps), nframes, height, width, tsteps, treplay, tloop))
+
+    bench_backends(100000, 6, 10 ** 4)
+    bench_backends(100000, 100, 10 ** 4)
@@ -1,3 +1,4 @@
+import collections
 import re
 import numpy as np
 import sys
@@ -99,22 +100,302 @@ def apply_draw_commands(state, commands):
 
     return state
 
+# compiled command programs
+#
+# a program is an (n, 3) int64 ndarray of (opcode, a, b) rows, where the opcodes are the indices of the command
+# classes in command_classes:
+#    draw_rect_op:          (draw_rect_op, x, y)
+#    rotate_row_op:         (rotate_row_op, row, byrows)
+#    rotate_column_op:      (rotate_column_op, column, bycolumns)
+draw_rect_op, rotate_row_op, rotate_column_op = [command_classes.index(cmdclass) for cmdclass in
+                                                 (DrawRectCommand, RotateRowCommand, RotateColumnCommand)]
+
+# a single regular expression matching every command, with a pair of groups per opcode
+compile_command_re = re.compile('^(?:' + '|'.join(cmdclass.match_re.pattern for cmdclass in command_classes) + ')$',
+                                re.MULTILINE)
+
+
+def compile_draw_commands(commands):
+    """
+    Compile a list of command strings into a program, merging consecutive rotations of the same row or column
+    into one rotation by the net shift.
+
+    :param commands: an array of strings containing display commands
+    :return: a program ndarray (see above)
+    """
+    matches = compile_command_re.findall('\n'.join(commands))
+    assert len(matches) == len(commands), "Command text didn't match any known commands"
+    if not matches:
+        return np.zeros((0, 3), dtype=np.int64)
+
+    # only the pair of groups for the matching command is non-empty
+    groups = np.array(matches)
+    ops = np.argmax(groups[:, 0::2] != '', axis=1)
+    a = np.char.add(np.char.add(groups[:, 0], groups[:, 2]), groups[:, 4]).astype(np.int64)
+    b = np.char.add(np.char.add(groups[:, 1], groups[:, 3]), groups[:, 5]).astype(np.int64)
+
+    # a rotation starts a new run unless it rotates the same row or column as the command before
+    newrun = np.ones(len(ops), dtype=bool)
+    newrun[1:] = (ops[1:] == draw_rect_op) | (ops[1:] != ops[:-1]) | (a[1:] != a[:-1])
+    runstarts = np.flatnonzero(newrun)
+
+    return np.stack((ops[runstarts], a[runstarts], np.add.reduceat(b, runstarts)), axis=1)
+
+
+def run_draw_program(state, program):
+    """
+    Run a compiled program on a state in place. Rotations copy the row or column through a scratch buffer
+    allocated once, so no new arrays are made per command.
+
+    :param state: A numpy array holding the state
+    :param program: a program ndarray (see compile_draw_commands)
+    :return: state, updated in place
+    """
+    height, width = state.shape
+    scratch = np.empty(max(height, width), dtype=state.dtype)
+
+    for op, a, b in program.tolist():
+        if op == draw_rect_op:
+            state[0:b, 0:a] = 1
+            continue
+
+        if op == rotate_row_op:
+            line, length = state[a, :], width
+        else:
+            line, length = state[:, a], height
+
+        shift = b % length
+        if shift:
+            scratch[0:length] = line
+            line[shift:] = scratch[0:length - shift]
+            line[0:shift] = scratch[length - shift:length]
+
+    return state
+
+
+def apply_compiled_draw_commands(state, commands):
+    """
+    Applies a list of command strings to an initial state, via compile_draw_commands and run_draw_program.
+    Gives the same result as apply_draw_commands.
+
+    :param state: A numpy array holding the state, zero for 'off', one for 'on', typically as an integer type
+    :param commands: an array of strings containing display commands
+    :return: state, updated in place
+    """
+    return run_draw_program(state, compile_draw_commands(commands))
+
+
+class PermutationCache(object):
+    """
+    Least recently used cache of rotation run permutations, bounded by the total bytes of the permutations it holds
+    rather than by their number, since each one is as large as the display (4 bytes a pixel, or 8 bytes for displays
+    of 2**31 pixels or more). Permutations larger than the whole limit are not cached.
+
+    Keyed on the display shape and the run as a tuple of (op, index, shift) tuples.
+    """
+    def __init__(self, maxbytes):
+        self.maxbytes = maxbytes
+        self.clear()
+
+    def clear(self):
+        self.permutations = collections.OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, shape, run):
+        key = (shape, run)
+        perm = self.permutations.get(key)
+        if perm is not None:
+            self.permutations.move_to_end(key)
+            self.hits += 1
+            return perm
+
+        self.misses += 1
+        perm = compose_rotation_run(shape, run)
+        if perm.nbytes <= self.maxbytes:
+            self.permutations[key] = perm
+            self.nbytes += perm.nbytes
+            while self.nbytes > self.maxbytes:
+                _, evicted = self.permutations.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return perm
+
+
+def compose_rotation_run(shape, run):
+    """
+    Compose a run of rotations into one flat index permutation, such that state.ravel()[perm] is the state after
+    the rotations. The rotations are simply run on an array of the flat indices.
+
+    :param shape: the (height, width) of the display
+    :param run: sequence of (op, index, shift) rotations (see compile_draw_commands)
+    :return: a read-only flat ndarray of pixel indices
+    """
+    dtype = np.int32 if shape[0] * shape[1] < 2 ** 31 else np.int64
+    perm = np.arange(shape[0] * shape[1], dtype=dtype).reshape(shape)
+    run_draw_program(perm, np.array(run, dtype=np.int64).reshape(-1, 3))
+
+    perm = perm.ravel()
+    perm.flags.writeable = False
+    return perm
+
+
+# repeated rotation runs are only composed once, holding at most 256MB of permutations
+rotation_run_permutations = PermutationCache(256 << 20)
+
+
+def rotation_run_permutation(shape, run):
+    """
+    Cached compose_rotation_run (see rotation_run_permutations).
+    """
+    return rotation_run_permutations.get(tuple(shape), tuple(map(tuple, run)))
+
+
+def compile_permutation_steps(program, shape):
+    """
+    Turn a program into steps where each run of rotations between rects is a single flat index permutation.
+
+    :param program: a program ndarray (see compile_draw_commands)
+    :param shape: the (height, width) of the display
+    :return: a list of steps, each either a flat permutation ndarray (see rotation_run_permutation) or an (x, y)
+             tuple for a rect
+    """
+    steps = []
+    rects = np.flatnonzero(program[:, 0] == draw_rect_op)
+    start = 0
+    for end in list(rects) + [len(program)]:
+        if end > start:
+            steps.append(rotation_run_permutation(shape, program[start:end].tolist()))
+        if end < len(program):
+            steps.append(tuple(program[end, 1:3].tolist()))
+        start = end + 1
+
+    return steps
+
+
+def replay_permutation_steps(frames, steps):
+    """
+    Replay permutation steps on many display states at once, with one fancy-indexing gather per rotation run.
+
+    :param frames: an (nframes, height, width) ndarray of display states
+    :param steps: a list of steps (see compile_permutation_steps)
+    :return: a new ndarray of the frames after every step
+    """
+    nframes, height, width = frames.shape
+    flat = frames.reshape(nframes, height * width).copy()
+    for step in steps:
+        if isinstance(step, tuple):
+            x, y = step
+            flat.reshape(nframes, height, width)[:, 0:y, 0:x] = 1
+        else:
+            flat = flat[:, step]
+
+    return flat.reshape(nframes, height, width)
+
+
+def apply_draw_commands_to_frames(frames, commands):
+    """
+    Applies a list of command strings to many initial states (each gets the same result as apply_draw_commands).
+
+    :param frames: an (nframes, height, width) ndarray of display states
+    :param commands: an array of strings containing display commands
+    :return: a new ndarray of the frames after all the commands
+    """
+    steps = compile_permutation_steps(compile_draw_commands(commands), frames.shape[1:])
+    return replay_permutation_steps(frames, steps)
+
+
+class BitPackedDisplay(object):
+    """
+    Display state with each row packed into a python int, where bit x holds the pixel in column x.
+
+    Rotating a row is a masked bit rotate, and a rect is an OR of the first rows with a (cached) mask of the first
+    columns. Rotating a column moves one bit between the rows.
+    """
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.mask = (1 << width) - 1
+        self.rows = [0] * height
+        self.rect_masks = {}
+
+    def rect(self, x, y):
+        rect_mask = self.rect_masks.get(x)
+        if rect_mask is None:
+            rect_mask = self.rect_masks[x] = (1 << min(x, self.width)) - 1
+
+        for i in range(min(y, self.height)):
+            self.rows[i] |= rect_mask
+
+    def rotate_row(self, row, byrows):
+        shift = byrows % self.width
+        if shift:
+            r = self.rows[row]
+            self.rows[row] = ((r << shift) & self.mask) | (r >> (self.width - shift))
+
+    def rotate_column(self, column, bycolumns):
+        shift = bycolumns % self.height
+        if shift:
+            bit = 1 << column
+            rows = self.rows
+            bits = [r & bit for r in rows]
+            rotated = bits[-shift:] + bits[:-shift]
+            # only rows where the pixel changes are rewritten, flipping the bit costs a copy of the row
+            for i, (b, rb) in enumerate(zip(bits, rotated)):
+                if b != rb:
+                    rows[i] ^= bit
+
+    def run_program(self, program):
+        """
+        Run a compiled program (see compile_draw_commands) on the display.
+        """
+        perform = {draw_rect_op: self.rect, rotate_row_op: self.rotate_row, rotate_column_op: self.rotate_column}
+        for op, a, b in program.tolist():
+            perform[op](a, b)
+
+    def to_array(self):
+        """
+        :return: the display as a (height, width) int32 ndarray of zeros and ones
+        """
+        nbytes = (self.width + 7) // 8
+        packed = np.frombuffer(b''.join([r.to_bytes(nbytes, 'little') for r in self.rows]), dtype=np.uint8)
+        bits = np.unpackbits(packed.reshape(self.height, nbytes), axis=1, bitorder='little')
+        return bits[:, 0:self.width].astype(np.int32)
+
+    @staticmethod
+    def from_array(state):
+        display = BitPackedDisplay(*state.shape)
+        packed = np.packbits(state != 0, axis=1, bitorder='little')
+        display.rows = [int.from_bytes(row.tobytes(), 'little') for row in packed]
+        return display
+
+
+def render_state(state):
+    """
+    Render the display as one string, splitting it along expected character groups (as written by print_state).
+
+    :param state: A numpy array holding the state
+    :return: string with a '\\r\\n' and then the row for each row of the display
+    """
+    height, width = state.shape
+
+    # the row starts with the line break, and a space goes before every 5th column
+    columns = 2 + np.arange(width) + np.arange(width) // 5
+    frame = np.full((height, 2 + width + max(width - 1, 0) // 5), ord(' '), dtype=np.uint8)
+    frame[:, 0] = ord('\r')
+    frame[:, 1] = ord('\n')
+    frame[:, columns] = np.where(state != 0, ord('#'), ord('.'))
+
+    return frame.tobytes().decode('ascii')
+
+
 def print_state(state):
     """
     Pretty print the display, splitting it along expected character groups
     :param state: A numpy array holding the state
     :return: nothing. Writes to stdout.
     """
-    statesize = state.shape
-    for y in range(0,statesize[0]):
-        sys.stdout.write('\r\n')
-        for x in range(0,statesize[1]):
-            if x != 0 and (x % 5) == 0:
-                sys.stdout.write(' ')
-            if state[y, x]:
-                sys.stdout.write('#')
-            else:
-                sys.stdout.write('.')
+    sys.stdout.write(render_state(state))
 
 
 if __name__ == '__main__':
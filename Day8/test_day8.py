@@ -1,7 +1,28 @@
 import unittest
+import contextlib
+import io
+import random
 import numpy as np
 
 from day8 import DrawRectCommand, RotateRowCommand, RotateColumnCommand, apply_draw_commands
+from day8 import compile_draw_commands, apply_compiled_draw_commands, rotate_row_op, rotate_column_op, draw_rect_op
+from day8 import apply_draw_commands_to_frames, compile_permutation_steps, rotation_run_permutations, PermutationCache
+from day8 import BitPackedDisplay, render_state, print_state
+
+
+def random_commands(seed, ncommands, height, width):
+    # few distinct rows and columns, so that there are runs of rotations to merge
+    rng = random.Random(seed)
+    commands = []
+    for _ in range(ncommands):
+        kind = rng.random()
+        if kind < 0.2:
+            commands.append('rect {}x{}'.format(rng.randint(1, width), rng.randint(1, height)))
+        elif kind < 0.6:
+            commands.append('rotate row y={} by {}'.format(rng.randint(0, min(2, height - 1)), rng.randint(0, 3 * width)))
+        else:
+            commands.append('rotate column x={} by {}'.format(rng.randint(0, min(2, width - 1)), rng.randint(0, 3 * height)))
+    return commands
 
 
 # For example, here is a simple sequence on a smaller screen:
@@ -92,5 +113,93 @@ class Day8Tests(unittest.TestCase):
                              [0, 1, 0, 0, 0, 0, 0]])
         self.assertTrue(np.array_equal(state, expected))
 
+    def test_compile_merges_rotations(self):
+        program = compile_draw_commands(['rotate row y=1 by 3',
+                                         'rotate row y=1 by 4',
+                                         'rotate column x=1 by 2',
+                                         'rotate row y=1 by 1',
+                                         'rect 1x2',
+                                         'rect 1x2'])
+        self.assertEqual(program.tolist(), [[rotate_row_op, 1, 7],
+                                            [rotate_column_op, 1, 2],
+                                            [rotate_row_op, 1, 1],
+                                            [draw_rect_op, 1, 2],
+                                            [draw_rect_op, 1, 2]])
+
+    def test_apply_compiled_draw_commands(self):
+        commands = ['rect 3x2',
+                    'rotate column x=1 by 1',
+                    'rotate row y=0 by 4',
+                    'rotate column x=1 by 1']
+        state = apply_compiled_draw_commands(np.zeros((3,7), dtype=np.int32), commands)
+        expected = np.array([[0, 1, 0, 0, 1, 0, 1],
+                             [1, 0, 1, 0, 0, 0, 0],
+                             [0, 1, 0, 0, 0, 0, 0]])
+        self.assertTrue(np.array_equal(state, expected))
+
+    def test_compiled_matches_commands_random(self):
+        for seed, (height, width) in enumerate([(1, 1), (3, 7), (6, 50), (11, 4)]):
+            commands = random_commands(seed, 500, height, width)
+            expected = apply_draw_commands(np.zeros((height, width), dtype=np.int32), commands)
+            state = apply_compiled_draw_commands(np.zeros((height, width), dtype=np.int32), commands)
+            self.assertTrue(np.array_equal(state, expected))
+
+    def test_frames_match_commands_random(self):
+        rng = np.random.default_rng(14)
+        for seed, (height, width) in enumerate([(1, 1), (3, 7), (6, 50), (11, 4)]):
+            commands = random_commands(seed, 300, height, width)
+            frames = rng.integers(0, 2, size=(20, height, width)).astype(np.int32)
+
+            result = apply_draw_commands_to_frames(frames, commands)
+            for frame, resultframe in zip(frames, result):
+                expected = apply_draw_commands(frame.copy(), commands)
+                self.assertTrue(np.array_equal(resultframe, expected))
+
+    def test_permutation_cache(self):
+        commands = ['rotate row y=0 by 1', 'rotate column x=0 by 1', 'rect 1x1'] * 3
+        rotation_run_permutations.clear()
+        steps = compile_permutation_steps(compile_draw_commands(commands), (3, 7))
+
+        # each of the 3 identical rotation runs is only composed once
+        self.assertEqual(len(steps), 6)
+        self.assertIs(steps[0], steps[2])
+        self.assertEqual(rotation_run_permutations.misses, 1)
+
+    def test_permutation_cache_byte_limit(self):
+        # room for two 3x7 permutations of 4 byte indices
+        cache = PermutationCache(2 * 21 * 4)
+        runs = [((rotate_row_op, 0, shift),) for shift in range(1, 4)]
+        for run in runs:
+            cache.get((3, 7), run)
+        self.assertEqual(cache.nbytes, 2 * 21 * 4)
+        self.assertEqual(list(cache.permutations), [((3, 7), run) for run in runs[1:]])
+
+        # permutations larger than the limit are composed but not kept
+        self.assertEqual(len(cache.get((30, 70), runs[0])), 2100)
+        self.assertEqual(len(cache.permutations), 2)
+
+    def test_bitpacked_matches_commands_random(self):
+        for seed, (height, width) in enumerate([(1, 1), (3, 7), (6, 50), (11, 4), (3, 200)]):
+            commands = random_commands(seed, 500, height, width)
+            expected = apply_draw_commands(np.zeros((height, width), dtype=np.int32), commands)
+
+            display = BitPackedDisplay(height, width)
+            display.run_program(compile_draw_commands(commands))
+            self.assertTrue(np.array_equal(display.to_array(), expected))
+            self.assertTrue(np.array_equal(BitPackedDisplay.from_array(expected).to_array(), expected))
+
+    def test_render_state(self):
+        state = np.array([[0, 1, 0, 0, 1, 0, 1],
+                          [1, 0, 1, 0, 0, 0, 0],
+                          [0, 1, 0, 0, 0, 0, 0]])
+        self.assertEqual(render_state(state), '\r\n.#..# .#'
+                                              '\r\n#.#.. ..'
+                                              '\r\n.#... ..')
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            print_state(state)
+        self.assertEqual(output.getvalue(), render_state(state))
+
 if __name__ == '__main__':
     unittest.main()
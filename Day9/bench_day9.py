@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import timeit
+
+from day9 import match_text_then_duplicate_directive_re, decompress_to, decompressed_length
+from day9 import file_decompressed_length
+
+# compare the original string-concatenating decompressor against streaming the output into a file, and measure the
+# rate at which a large v2 expansion can be written out to disk
+# usage: python bench_day9.py [ndirectives]
+
+
+def decompress_by_concatenation(compressed):
+    # the original decompressor
+    pos = 0
+    output = ''
+
+    while pos < len(compressed):
+        match = match_text_then_duplicate_directive_re.match(compressed, pos=pos)
+        if match:
+            prefix, numchars, numrepeats = match.group(1, 2, 3)
+            pos = match.end()
+            output = output + prefix + (compressed[pos:pos + int(numchars)] * int(numrepeats))
+            pos += int(numchars)
+        else:
+            output = output + compressed[pos:]
+            pos = len(compressed)
+
+    return output
+
+
+def recursive_decompressed_length(compressed, v2=False):
+    # the original length computation, recursing on a copy of each repeated section
+    pos = 0
+    outputlen = 0
+
+    while pos < len(compressed):
+        match = match_text_then_duplicate_directive_re.match(compressed, pos=pos)
+        if match:
+            prefix, numchars, numrepeats = match.group(1, 2, 3)
+            pos = match.end()
+            outputlen += len(prefix)
+            decompseq = compressed[pos:pos + int(numchars)]
+            if v2:
+                outputlen += recursive_decompressed_length(decompseq, v2) * int(numrepeats)
+            else:
+                outputlen += len(decompseq) * int(numrepeats)
+            pos += int(numchars)
+        else:
+            outputlen += len(compressed[pos:])
+            pos = len(compressed)
+
+    return outputlen
+
+
+def deeply_nested(depth, padding):
+    # each level wraps the previous one with some literal text, so the recursion copies most of the input per level
+    compressed = 'A'
+    for _ in range(depth):
+        compressed = '({}x2){}'.format(len(compressed) + padding, compressed + 'B' * padding)
+    return compressed
+
+
+if __name__ == '__main__':
+    ndirectives = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    compressed = 'AB(3x10)XYZ' * ndirectives
+
+    tconcat = timeit.timeit(lambda: decompress_by_concatenation(compressed), number=1)
+    with open(os.devnull, 'w') as sink:
+        tstream = timeit.timeit(lambda: decompress_to(compressed, sink), number=1)
+    print('v1, {} directives: concatenation {:.2f}s, streaming {:.3f}s ({:.0f}x)'.format(
+        ndirectives, tconcat, tstream, tconcat / tstream))
+
+    nested = '(27x12)(20x12)(13x14)(7x10)(1x12)ABCD(25x100)(18x100)(11x100)(1x100)Z'
+    outputlen = decompressed_length(nested, v2=True)
+    with tempfile.TemporaryFile('w') as sink:
+        tstream = timeit.timeit(lambda: decompress_to(nested, sink, v2=True, chunklength=1 << 20), number=1)
+    print('v2, {:.2f}GB expansion streamed to a file in {:.2f}s ({:.0f}MB/s)'.format(
+        outputlen / 1e9, tstream, outputlen / 1e6 / tstream))
+
+    for depth, padding in ((100, 1000), (900, 100), (900, 1000)):
+        compressed = deeply_nested(depth, padding)
+        trecursive = timeit.timeit(lambda: recursive_decompressed_length(compressed, v2=True), number=1)
+        titerative = timeit.timeit(lambda: decompressed_length(compressed, v2=True), number=1)
+        print('v2 length, depth {} over {} characters: recursive {:.3f}s, iterative {:.4f}s ({:.0f}x)'.format(
+            depth, len(compressed), trecursive, titerative, trecursive / titerative))
+
+    compressed = deeply_nested(100000, 0)
+    titerative = timeit.timeit(lambda: decompressed_length(compressed, v2=True), number=1)
+    print('v2 length, depth 100000 over {} characters: iterative {:.2f}s (beyond the recursion limit)'.format(
+        len(compressed), titerative))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'input.txt')
+        with open(filename, 'w') as outfile:
+            outfile.write('ABCDEFGHIJKLMNOPQRSTUVWXYZ(30x4)abcdefghijklmnopqrstuvwxyz0123(9x9)(1x3)X' * ndirectives * 20 + '\n')
+        size = os.path.getsize(filename)
+
+        def read_lines_then_measure():
+            with open(filename, 'r') as infile:
+                compressedlines = infile.read().splitlines()
+            return recursive_decompressed_length(compressedlines[0], v2=True)
+
+        tread = timeit.timeit(read_lines_then_measure, number=1)
+        tmmap = timeit.timeit(lambda: file_decompressed_length(filename, v2=True), number=1)
+        assert read_lines_then_measure() == file_decompressed_length(filename, v2=True)
+        print('v2 length of a {:.0f}MB file: read and splitlines {:.2f}s, mmap scanner {:.2f}s ({:.1f}x)'.format(
+            size / 1e6, tread, tmmap, tread / tmmap))
@@ -1,3 +1,6 @@
+import contextlib
+import mmap
+import os
 import re
 
 # match input text that starts with zero or more content characters followed by a single
@@ -5,64 +8,254 @@ import re
 # are the values in the directive (number of characters to repeat, number of repeats).
 match_text_then_duplicate_directive_re = re.compile('([^(]*)\(([0-9]+)x([0-9]+)\)')
 
-def decompress(compressed):
-    pos = 0
-    output=''
+# match just the duplication directive, for text (str) and for bytes-like buffers (bytes, mmap). Groups 1 and 2 are
+# the number of characters to repeat and the number of repeats.
+duplicate_directive_re = re.compile(r'\(([0-9]+)x([0-9]+)\)')
+duplicate_directive_bytes_re = re.compile(rb'\(([0-9]+)x([0-9]+)\)')
 
-    while(pos<len(compressed)):
-        # find the first match after pos
-        match = match_text_then_duplicate_directive_re.match(compressed,pos=pos)
-        if match:
-            prefix, numchars, numrepeats = match.group(1,2,3)
-            pos = match.end()
 
-            output = output + prefix + (compressed[pos:pos+int(numchars)]*int(numrepeats))
-            pos += int(numchars)
-        else:
-            # if there was no match, then the remainder of input includes no directives
-            output = output + compressed[pos:]
-            pos = len(compressed)
+def directive_pattern(compressed):
+    """
+    :return: tuple of the '(' and the directive regex, matching the type of compressed (str, or bytes-like)
+    """
+    if isinstance(compressed, str):
+        return '(', duplicate_directive_re
+    return b'(', duplicate_directive_bytes_re
 
-    return output
 
-def decompressed_length(compressed, v2=False):
-    # assuming we don't have 'split' directives, then we can apply this recursively
-    pos = 0
+def find_directive(compressed, pos, end):
+    """
+    Find the first duplication directive in compressed[pos:end], without copying the text before it.
+
+    As with match_text_then_duplicate_directive_re, a '(' that does not start a directive means that the remainder
+    holds no directives.
+
+    :param compressed: str, bytes or mmap buffer
+    :return: the match of the directive (match.start() is the position of its '('), or None
+    """
+    paren, directive_re = directive_pattern(compressed)
+    start = compressed.find(paren, pos, end)
+    if start < 0:
+        return None
+    return directive_re.match(compressed, start, end)
+
+
+def iter_decompressed_pieces(compressed, v2=False, chunklength=1 << 16, end=None):
+    """
+    Expand the directives in compressed, yielding the output as a sequence of pieces as they are produced.
+
+    Memory is bounded by the nesting depth of the directives rather than the output size: repeated sections are
+    yielded a batch of repeats at a time (a batch holds at most chunklength characters, or one copy of the section if
+    it is longer). In v2 mode nested directives are expanded from a stack of (pos, start, end, repeats left) ranges
+    into compressed, without recursion. While a nested section makes its first pass, its output is captured; if that
+    comes to at most chunklength characters, the remaining repeats reuse the captured text instead of expanding the
+    section again. Otherwise the captured pieces are yielded and the section is expanded again for each repeat.
+
+    :param compressed: the compressed text (str, or a bytes/mmap buffer to get bytes pieces)
+    :param v2: expand directives inside the repeated sections too (assumes that no directive straddles a section end)
+    :param chunklength: the number of characters to aim for in each repeated batch
+    :param end: the end of the compressed text in the buffer (defaults to its length)
+    """
+    # each frame holds [pos, start, end, repeatsleft, capture] for a section that is being repeated, where capture is
+    # the list of pieces from its first pass (or None when it is not capturing)
+    stack = [[0, 0, len(compressed) if end is None else end, 1, None]]
+
+    # the capturing frames, from the bottom of the stack up, and the total length of the pieces they hold. Output
+    # goes to the topmost capturing frame, since the frames above it are inside it.
+    capturing = []
+    capturedlength = 0
+
+    def emit(piece):
+        nonlocal capturedlength
+        if not capturing:
+            yield piece
+            return
+
+        capturing[-1][4].append(piece)
+        capturedlength += len(piece)
+        # a frame holds its own pieces and those of the capturing frames above it, so when the total is too long the
+        # bottom capturing frame has overflowed: its pieces come first in the output
+        while capturing and capturedlength > chunklength:
+            frame = capturing.pop(0)
+            for captured in frame[4]:
+                capturedlength -= len(captured)
+                yield captured
+            frame[4] = None
+
+    def emit_repeats(section, numrepeats):
+        if not section:
+            return
+        batchrepeats = max(1, chunklength // len(section))
+        while numrepeats > 0:
+            yield from emit(section * min(batchrepeats, numrepeats))
+            numrepeats -= batchrepeats
+
+    while stack:
+        frame = stack[-1]
+        pos, start, end, repeatsleft, capture = frame
+        if pos >= end:
+            stack.pop()
+            if capture is not None:
+                # the first pass was short enough to keep, so repeat it as it is
+                capturing.pop()
+                capturedlength -= sum(len(captured) for captured in capture)
+                yield from emit_repeats(compressed[0:0].join(capture), repeatsleft)
+            elif repeatsleft > 1:
+                frame[0] = start
+                frame[3] = repeatsleft - 1
+                stack.append(frame)
+            continue
+
+        # find the first directive after pos (within this section)
+        match = find_directive(compressed, pos, end)
+        if not match:
+            # if there was no match, then the remainder of the section includes no directives
+            yield from emit(compressed[pos:end])
+            frame[0] = end
+            continue
+
+        if match.start() > pos:
+            yield from emit(compressed[pos:match.start()])
+
+        numchars, numrepeats = match.group(1, 2)
+        sectionstart = match.end()
+        sectionend = min(sectionstart + int(numchars), end)
+        frame[0] = sectionend
+
+        # sections are searched in place, only plain text sections are copied out of the buffer
+        if v2 and find_directive(compressed, sectionstart, sectionend):
+            frame = [sectionstart, sectionstart, sectionend, int(numrepeats), None]
+            if int(numrepeats) > 1:
+                frame[4] = []
+                capturing.append(frame)
+            stack.append(frame)
+            continue
+
+        yield from emit_repeats(compressed[sectionstart:sectionend], int(numrepeats))
+
+
+def iter_decompressed(compressed, v2=False, chunklength=1 << 16, end=None):
+    """
+    Expand the directives in compressed, yielding the output in chunks of around chunklength characters.
+
+    Small pieces from iter_decompressed_pieces are joined together so that the consumer sees few, large chunks.
+    """
+    empty = compressed[0:0]
+    pieces = []
+    piecelength = 0
+    for piece in iter_decompressed_pieces(compressed, v2, chunklength, end):
+        pieces.append(piece)
+        piecelength += len(piece)
+        if piecelength >= chunklength:
+            yield empty.join(pieces)
+            pieces = []
+            piecelength = 0
+
+    if pieces:
+        yield empty.join(pieces)
+
+
+def decompress_to(compressed, sink, v2=False, chunklength=1 << 16, end=None):
+    """
+    Decompress into a file-like sink, without holding the whole output in memory.
+
+    :param compressed: the compressed text
+    :param sink: object with a write method (e.g. a file opened for text writing, or binary writing for bytes input)
+    :param v2: expand directives inside the repeated sections too
+    :param chunklength: the number of characters to aim for in each write
+    :param end: the end of the compressed text in the buffer (defaults to its length)
+    :return: the decompressed length
+    """
     outputlen = 0
+    for chunk in iter_decompressed(compressed, v2, chunklength, end):
+        sink.write(chunk)
+        outputlen += len(chunk)
+    return outputlen
+
+
+def decompress(compressed, v2=False):
+    return compressed[0:0].join(iter_decompressed(compressed, v2))
 
-    while (pos < len(compressed)):
-        # find the first match after pos
-        match = match_text_then_duplicate_directive_re.match(compressed, pos=pos)
-        if match:
-            prefix, numchars, numrepeats = match.group(1, 2, 3)
-            pos = match.end()
+def range_decompressed_length(compressed, start, end, v2=False):
+    """
+    Decompressed length of compressed[start:end], computed in a single pass over the range without copying it.
+    compressed can be a str, or a bytes-like buffer such as an mmap of the input file.
+
+    In v2 mode a stack holds the (end, weight) of each section being expanded, where the weight is the product of the
+    repeat counts of all enclosing directives, so each character is visited once whatever the nesting depth.
+    """
+    paren, directive_re = directive_pattern(compressed)
+    outputlen = 0
+    stack = [(end, 1)]
+    pos = start
 
-            outputlen += len(prefix)
+    while stack:
+        sectionend, weight = stack[-1]
+        if pos >= sectionend:
+            stack.pop()
+            continue
 
-            # get the sequence from performing this directive, and then try and decompress it
-            decompseq = compressed[pos:pos + int(numchars)]
-            if v2:
-                outputlen += decompressed_length(decompseq, v2) * int(numrepeats)
-            else:
-                outputlen += len(decompseq) * int(numrepeats)
+        # find the first directive after pos (within this section), as find_directive does
+        directivestart = compressed.find(paren, pos, sectionend)
+        match = directive_re.match(compressed, directivestart, sectionend) if directivestart >= 0 else None
+        if not match:
+            # if there was no match, then the remainder of the section includes no directives
+            outputlen += (sectionend - pos) * weight
+            pos = sectionend
+            continue
 
-            pos += int(numchars)
+        outputlen += (directivestart - pos) * weight
+        pos = match.end()
+        numchars, numrepeats = match.group(1, 2)
+        repeatend = min(pos + int(numchars), sectionend)
+        if v2 and compressed.find(paren, pos, repeatend) >= 0:
+            stack.append((repeatend, weight * int(numrepeats)))
         else:
-            # if there was no match, then the remainder of input includes no directives
-            outputlen += len(compressed[pos:])
-            pos = len(compressed)
+            # sections without directives are counted directly, rather than being pushed
+            outputlen += (repeatend - pos) * weight * int(numrepeats)
+            pos = repeatend
 
     return outputlen
 
-if __name__ == '__main__':
-    with(open('input_9a.txt', 'r')) as infile:
-        compressedlines = infile.read().splitlines()
 
-    # should only be one line!
-    assert(len(compressedlines)==1)
+def decompressed_length(compressed, v2=False):
+    return range_decompressed_length(compressed, 0, len(compressed), v2)
+
+
+@contextlib.contextmanager
+def open_compressed_file(filename):
+    """
+    Map a compressed input file into memory, for use with the functions above without reading it into a str.
+
+    :return: context manager giving a tuple of (buffer, end), where buffer is an mmap of the file (or empty bytes for
+        an empty file) and end excludes the trailing line break
+    """
+    if os.path.getsize(filename) == 0:
+        yield b'', 0
+        return
 
-    print(decompressed_length(compressedlines[0], v2=False))
-    print(decompressed_length(compressedlines[0], v2=True))
+    with open(filename, 'rb') as infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        end = len(buffer)
+        while end > 0 and buffer[end - 1:end] in (b'\r', b'\n'):
+            end -= 1
+        yield buffer, end
 
 
+def file_decompressed_length(filename, v2=False):
+    with open_compressed_file(filename) as (buffer, end):
+        return range_decompressed_length(buffer, 0, end, v2)
 
+
+def decompress_file_to(filename, sink, v2=False, chunklength=1 << 20):
+    """
+    Decompress an input file into a binary file-like sink.
+
+    :return: the decompressed length
+    """
+    with open_compressed_file(filename) as (buffer, end):
+        return decompress_to(buffer, sink, v2, chunklength, end)
+
+
+if __name__ == '__main__':
+    print(file_decompressed_length('input_9a.txt', v2=False))
+    print(file_decompressed_length('input_9a.txt', v2=True))
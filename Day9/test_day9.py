@@ -1,6 +1,46 @@
+import io
+import os
+import random
+import tempfile
 import unittest
 
-from day9 import decompressed_length
+from day9 import decompressed_length, range_decompressed_length, decompress, decompress_to, iter_decompressed
+from day9 import file_decompressed_length, decompress_file_to
+
+
+def random_compressed(rng, depth=3):
+    # well formed input, where every directive covers whole nested sections
+    parts = []
+    for _ in range(rng.randint(1, 4)):
+        if depth > 0 and rng.random() < 0.5:
+            section = random_compressed(rng, depth - 1)
+            parts.append('({}x{}){}'.format(len(section), rng.randint(1, 5), section))
+        else:
+            parts.append(''.join(rng.choice('ABC') for _ in range(rng.randint(0, 4))))
+    return ''.join(parts)
+
+
+def reference_decompress_v2(compressed):
+    # straightforward recursive expansion, for checking the streaming decompressor on shallow inputs
+    output = ''
+    pos = 0
+    while pos < len(compressed):
+        if compressed[pos] == '(':
+            close = compressed.index(')', pos)
+            numchars, numrepeats = map(int, compressed[pos + 1:close].split('x'))
+            output += reference_decompress_v2(compressed[close + 1:close + 1 + numchars]) * numrepeats
+            pos = close + 1 + numchars
+        else:
+            output += compressed[pos]
+            pos += 1
+    return output
+
+
+def deeply_nested(depth, numrepeats=2):
+    compressed = 'A'
+    for _ in range(depth):
+        compressed = '({}x{}){}'.format(len(compressed), numrepeats, compressed)
+    return compressed
 
 class Day9aTests(unittest.TestCase):
     def test_example1(self):
@@ -55,6 +95,101 @@ class Day9bTests(unittest.TestCase):
         resultlen = decompressed_length('(25x3)(3x3)ABC(2x3)XY(5x2)PQRSTX(18x9)(3x2)TWO(5x7)SEVEN', v2=True)
         self.assertEqual(resultlen, 445)
 
+    def test_nesting_deeper_than_recursion_limit(self):
+        resultlen = decompressed_length(deeply_nested(5000), v2=True)
+        self.assertEqual(resultlen, 2 ** 5000)
+
+    def test_range(self):
+        compressed = 'X(8x2)(3x3)ABCY'
+        self.assertEqual(range_decompressed_length(compressed, 1, 14, v2=True), len('ABCABCABCABCABCABC'))
+
+
+class Day9DecompressTests(unittest.TestCase):
+    examples = [('ADVENT', 'ADVENT'), ('A(1x5)BC', 'ABBBBBC'), ('(3x3)XYZ', 'XYZXYZXYZ'),
+                ('A(2x2)BCD(2x2)EFG', 'ABCBCDEFEFG'), ('(6x1)(1x3)A', '(1x3)A'), ('X(8x2)(3x3)ABCY', 'X(3x3)ABC(3x3)ABCY')]
+    examples_v2 = [('(3x3)XYZ', 'XYZXYZXYZ'), ('X(8x2)(3x3)ABCY', 'XABCABCABCABCABCABCY'),
+                   ('(27x12)(20x12)(13x14)(7x10)(1x12)A', 'A' * 241920)]
+
+    def test_examples(self):
+        for compressed, expected in self.examples:
+            self.assertEqual(decompress(compressed), expected)
+
+    def test_examples_v2(self):
+        for compressed, expected in self.examples_v2:
+            self.assertEqual(decompress(compressed, v2=True), expected)
+
+    def test_lengths_match_random(self):
+        rng = random.Random(9)
+        for _ in range(300):
+            compressed = random_compressed(rng)
+            self.assertEqual(len(decompress(compressed)), decompressed_length(compressed))
+            self.assertEqual(len(decompress(compressed, v2=True)), decompressed_length(compressed, v2=True))
+
+    def test_deep_nesting(self):
+        # the nesting is kept on an explicit stack, so depth is not limited by the recursion limit
+        self.assertEqual(decompress(deeply_nested(3000, 1), v2=True), 'A')
+        self.assertEqual(decompress('X' + deeply_nested(3000, 1) + 'Y', v2=True), 'XAY')
+
+    def test_small_chunks_random(self):
+        # short chunks make captured sections overflow part way through, at every nesting level
+        rng = random.Random(17)
+        for _ in range(300):
+            compressed = random_compressed(rng)
+            expected = reference_decompress_v2(compressed)
+            for chunklength in (1, 3, 8, 1 << 16):
+                self.assertEqual(''.join(iter_decompressed(compressed, v2=True, chunklength=chunklength)), expected)
+
+    def test_chunks_are_bounded(self):
+        compressed = '(27x12)(20x12)(13x14)(7x10)(1x12)A'
+        chunks = list(iter_decompressed(compressed, v2=True, chunklength=1000))
+        self.assertEqual(''.join(chunks), 'A' * 241920)
+        self.assertTrue(all(len(chunk) < 2000 for chunk in chunks))
+
+    def test_decompress_to_sink(self):
+        sink = io.StringIO()
+        compressed = '(25x3)(3x3)ABC(2x3)XY(5x2)PQRSTX(18x9)(3x2)TWO(5x7)SEVEN'
+        self.assertEqual(decompress_to(compressed, sink, v2=True, chunklength=16), 445)
+        self.assertEqual(sink.getvalue(), decompress(compressed, v2=True))
+
+
+class SliceCountingBytes(bytes):
+    # bytes that records how many bytes are copied out of it by slicing
+    def __getitem__(self, key):
+        result = super().__getitem__(key)
+        if isinstance(key, slice):
+            self.copied += len(result)
+        return result
+
+
+class Day9BufferTests(unittest.TestCase):
+
+    def test_nested_sections_are_not_copied(self):
+        compressed = SliceCountingBytes(deeply_nested(300, 1).encode('ascii'))
+        compressed.copied = 0
+        self.assertEqual(decompress(compressed, v2=True), b'A')
+        self.assertLess(compressed.copied, 10)
+
+    def test_bytes_match_str_random(self):
+        rng = random.Random(19)
+        for _ in range(300):
+            compressed = random_compressed(rng) + rng.choice(['', '(', '(1x', 'A(2x'])
+            for v2 in (False, True):
+                self.assertEqual(decompressed_length(compressed.encode('ascii'), v2), decompressed_length(compressed, v2))
+                self.assertEqual(decompress(compressed.encode('ascii'), v2), decompress(compressed, v2).encode('ascii'))
+
+    def test_file(self):
+        compressed = '(25x3)(3x3)ABC(2x3)XY(5x2)PQRSTX(18x9)(3x2)TWO(5x7)SEVEN'
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'input.txt')
+            with open(filename, 'w') as outfile:
+                outfile.write(compressed + '\n')
+
+            self.assertEqual(file_decompressed_length(filename), decompressed_length(compressed))
+            self.assertEqual(file_decompressed_length(filename, v2=True), 445)
+
+            sink = io.BytesIO()
+            self.assertEqual(decompress_file_to(filename, sink, v2=True, chunklength=16), 445)
+            self.assertEqual(sink.getvalue(), decompress(compressed, v2=True).encode('ascii'))
 
 
 if __name__ == '__main__':